@@ -0,0 +1,202 @@
+# Pool of long-lived file-search assistants, one per vector store
+import asyncio
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Pool settings (override with environment variables)
+ASSISTANT_IDLE_TIMEOUT_SECONDS = float(os.getenv("ASSISTANT_IDLE_TIMEOUT_SECONDS", "600"))
+THREAD_CLEANUP_BATCH_SIZE = int(os.getenv("THREAD_CLEANUP_BATCH_SIZE", "16"))
+ASSISTANT_REAP_INTERVAL_SECONDS = float(os.getenv("ASSISTANT_REAP_INTERVAL_SECONDS", "60"))
+
+FILE_SEARCH_ASSISTANT = dict(
+    name="Document Q&A Assistant",
+    instructions="You are a helpful assistant that answers questions based on the provided documents. Provide clear, accurate answers based on the document content.",
+    model="gpt-4o-mini",
+    tools=[{"type": "file_search"}]
+)
+
+
+@dataclass
+class PooledAssistant:
+    assistant_id: str
+    vector_store_id: str
+    last_used: float = field(default_factory=time.time)
+
+
+class AssistantPool:
+    """Reuses one assistant per vector store across questions and documents
+
+    Finished threads are queued and deleted in batches, and assistants that sit
+    idle longer than `idle_timeout` seconds are deleted on the next pool access
+    or by `reap_periodically`. Each method has a sync and an async (`*_async`)
+    form matching the client type. Sync callers get `close` run at interpreter
+    exit; async callers must await `close_async` before their loop ends.
+    """
+
+    def __init__(self, idle_timeout: float = ASSISTANT_IDLE_TIMEOUT_SECONDS, thread_batch_size: int = THREAD_CLEANUP_BATCH_SIZE):
+        self.idle_timeout = idle_timeout
+        self.thread_batch_size = thread_batch_size
+        self._assistants: Dict[str, PooledAssistant] = {}
+        self._finished_threads: List[str] = []
+        self._lock = threading.Lock()
+        self._create_locks: Dict[str, threading.Lock] = {}
+        self._async_create_locks: Dict[str, asyncio.Lock] = {}
+        self._closes_at_exit = False
+        self.assistants_created = 0
+
+    def _lookup(self, vector_store_id: str) -> Optional[str]:
+        with self._lock:
+            pooled = self._assistants.get(vector_store_id)
+            if pooled is None:
+                return None
+            pooled.last_used = time.time()
+            return pooled.assistant_id
+
+    def _store(self, vector_store_id: str, assistant_id: str) -> None:
+        with self._lock:
+            self._assistants[vector_store_id] = PooledAssistant(assistant_id, vector_store_id)
+            self.assistants_created += 1
+
+    def _take_idle(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            idle = [vs_id for vs_id, p in self._assistants.items() if now - p.last_used > self.idle_timeout]
+            return [self._assistants.pop(vs_id).assistant_id for vs_id in idle]
+
+    def _queue_thread(self, thread_id: str, force: bool = False) -> List[str]:
+        """Queue a finished thread; return a batch to delete once the queue is full"""
+        with self._lock:
+            if thread_id:
+                self._finished_threads.append(thread_id)
+            if not force and len(self._finished_threads) < self.thread_batch_size:
+                return []
+            batch, self._finished_threads = self._finished_threads, []
+            return batch
+
+    def _take_all(self) -> List[str]:
+        with self._lock:
+            assistant_ids = [p.assistant_id for p in self._assistants.values()]
+            self._assistants.clear()
+            return assistant_ids
+
+    @staticmethod
+    def _assistant_args(vector_store_id: str) -> dict:
+        return dict(
+            **FILE_SEARCH_ASSISTANT,
+            tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}}
+        )
+
+    # Sync client
+
+    def acquire(self, client, vector_store_id: str) -> str:
+        """Return the pooled assistant id for a vector store, creating it on first use"""
+        self.reap_idle(client)
+        assistant_id = self._lookup(vector_store_id)
+        if assistant_id:
+            return assistant_id
+        with self._lock:
+            create_lock = self._create_locks.setdefault(vector_store_id, threading.Lock())
+        with create_lock:
+            assistant_id = self._lookup(vector_store_id)
+            if assistant_id is None:
+                assistant_id = client.beta.assistants.create(**self._assistant_args(vector_store_id)).id
+                self._store(vector_store_id, assistant_id)
+                self._close_at_exit(client)
+        return assistant_id
+
+    def _close_at_exit(self, client) -> None:
+        """Register close once, so sync scripts don't leave assistants on the account"""
+        with self._lock:
+            if self._closes_at_exit:
+                return
+            self._closes_at_exit = True
+        atexit.register(self.close, client)
+
+    def release_thread(self, client, thread_id: str) -> None:
+        """Hand back a finished thread for batched deletion"""
+        for batch_thread_id in self._queue_thread(thread_id):
+            _ignore_errors(client.beta.threads.delete, batch_thread_id)
+
+    def reap_idle(self, client) -> None:
+        for assistant_id in self._take_idle():
+            print(f"🧹 Deleting idle assistant {assistant_id}")
+            _ignore_errors(client.beta.assistants.delete, assistant_id)
+
+    def close(self, client) -> None:
+        """Delete all pooled assistants and pending threads"""
+        for thread_id in self._queue_thread("", force=True):
+            _ignore_errors(client.beta.threads.delete, thread_id)
+        for assistant_id in self._take_all():
+            _ignore_errors(client.beta.assistants.delete, assistant_id)
+
+    # Async client
+
+    async def acquire_async(self, client, vector_store_id: str) -> str:
+        """Async variant of acquire"""
+        await self.reap_idle_async(client)
+        assistant_id = self._lookup(vector_store_id)
+        if assistant_id:
+            return assistant_id
+        create_lock = self._async_create_locks.setdefault(vector_store_id, asyncio.Lock())
+        async with create_lock:
+            assistant_id = self._lookup(vector_store_id)
+            if assistant_id is None:
+                assistant = await client.beta.assistants.create(**self._assistant_args(vector_store_id))
+                assistant_id = assistant.id
+                self._store(vector_store_id, assistant_id)
+        return assistant_id
+
+    async def release_thread_async(self, client, thread_id: str) -> None:
+        batch = self._queue_thread(thread_id)
+        if batch:
+            await asyncio.gather(*(_ignore_errors_async(client.beta.threads.delete, t) for t in batch))
+
+    async def reap_idle_async(self, client) -> None:
+        idle = self._take_idle()
+        for assistant_id in idle:
+            print(f"🧹 Deleting idle assistant {assistant_id}")
+        await asyncio.gather(*(_ignore_errors_async(client.beta.assistants.delete, a) for a in idle))
+
+    async def reap_periodically(self, client, interval: float = ASSISTANT_REAP_INTERVAL_SECONDS) -> None:
+        """Delete idle assistants every `interval` seconds until cancelled, even while the pool goes unused"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.reap_idle_async(client)
+
+    async def close_async(self, client) -> None:
+        threads = self._queue_thread("", force=True)
+        assistants = self._take_all()
+        await asyncio.gather(
+            *(_ignore_errors_async(client.beta.threads.delete, t) for t in threads),
+            *(_ignore_errors_async(client.beta.assistants.delete, a) for a in assistants)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "assistants": len(self._assistants),
+                "assistants_created": self.assistants_created,
+                "pending_thread_deletions": len(self._finished_threads)
+            }
+
+
+def _ignore_errors(func, *args) -> None:
+    try:
+        func(*args)
+    except Exception:
+        pass  # Ignore cleanup errors
+
+
+async def _ignore_errors_async(func, *args) -> None:
+    try:
+        await func(*args)
+    except Exception:
+        pass  # Ignore cleanup errors
+
+
+# Shared pool used by parsing_info_from_pdfs
+assistant_pool = AssistantPool()
@@ -0,0 +1,132 @@
+# Content-addressed narration audio stored on disk with LRU eviction under a byte budget
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Cache settings (override with environment variables)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "narration_audio"))
+AUDIO_CACHE_MAX_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "512"))
+
+# Speech settings; part of every cache key
+TTS_MODEL = os.getenv("TTS_MODEL", "tts-1")
+TTS_FORMAT = "mp3"
+
+
+def audio_cache_key(text: str, voice: str, model: str = TTS_MODEL, response_format: str = TTS_FORMAT) -> str:
+    """Content address of one narration: sha256 over text, voice, model and format"""
+    payload = json.dumps([text, voice, model, response_format], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Audio files named by cache key, indexed in memory in LRU order
+
+    The index is rebuilt from the directory on startup (oldest modified first),
+    so synthesized audio survives restarts. Writes go through a temp file and
+    os.replace, so readers never see partial files.
+    """
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_MB * 1024 * 1024,
+                 extension: str = TTS_FORMAT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size in bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def _load_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        suffix = f".{self.extension}"
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(suffix):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-len(suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: Optional[str]) -> Optional[bytes]:
+        """Return the audio for a key, or None if it was never stored or has been evicted"""
+        with self._lock:
+            if not key or key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not data or len(data) > self.max_bytes:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
+        with self._lock:
+            self._total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass  # Already gone
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._total_bytes = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+# Shared cache used by the deck, slide and custom narration paths
+audio_cache = AudioCache()
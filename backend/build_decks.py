@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Batch Deck Builder
+Runs extraction → summary → Q&A → slides → narration audio for a whole
+directory (or manifest) of PDFs, several documents at a time.
+
+Each document is checkpointed to <output>/<sha256>.json after every stage, so
+an interrupted run resumes where it stopped and finished documents are skipped.
+Narration audio goes to the shared audio cache, where the web app finds it.
+
+Usage:
+    python build_decks.py papers/                        # Every PDF under papers/
+    python build_decks.py catalog.txt --documents 8      # One PDF path per line
+    python build_decks.py papers/ --requests 16 --no-audio
+"""
+
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from assistant_pool import assistant_pool
+from data_models import DocumentSummary, SlideContent
+from embedding_index import EmbeddingIndex, create_embedder
+from local_retrieval import LocalRetrievalIndex, RETRIEVAL_BACKEND, LOCAL_RETRIEVAL_BACKENDS
+from pdf_extraction import extract_pdf_pages
+from prompt_budget import budget_stats
+from parsing_info_from_pdfs import (
+    generate_summary_async, generate_qa_pairs_from_document_async,
+    generate_qa_pairs_from_local_index_async, generate_slides_from_qa_pairs_async,
+    create_vector_store_async, upload_single_pdf_async
+)
+from slide_deck import narration_text
+from voice_agent import SimpleVoiceAgent
+
+# Batch defaults (override with environment variables)
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "decks")
+BATCH_DOCUMENT_CONCURRENCY = int(os.getenv("BATCH_DOCUMENT_CONCURRENCY", "4"))
+BATCH_REQUEST_CONCURRENCY = int(os.getenv("BATCH_REQUEST_CONCURRENCY", "8"))
+BATCH_NARRATION_VOICE = os.getenv("BATCH_NARRATION_VOICE", "alloy")
+
+# OpenAI HTTP requests made on behalf of each document, counted by an httpx event hook
+api_calls: Counter = Counter()
+current_document: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_document", default=None)
+
+
+def count_api_call(request: httpx.Request) -> None:
+    api_calls[current_document.get()] += 1
+
+
+async def count_api_call_async(request: httpx.Request) -> None:
+    count_api_call(request)
+
+
+def find_pdfs(source: str) -> List[str]:
+    """PDF paths under a directory, or listed one per line in a manifest file (# starts a comment)"""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(source)
+            for name in names if name.lower().endswith(".pdf")
+        )
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source) as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return [os.path.join(base_dir, line) for line in lines if line]
+
+
+def file_hash(path: str) -> str:
+    """sha256 of the file bytes, the same document hash the web app's caches use"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Per-document progress, rewritten atomically after every stage"""
+
+    def __init__(self, path: str, pdf_path: str, document_hash: str):
+        self.path = path
+        self.data = {"document_hash": document_hash, "filename": os.path.basename(pdf_path), "complete": False}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data.update(json.load(f))
+
+    def __getitem__(self, key):
+        return self.data.get(key)
+
+    def save(self, **fields) -> None:
+        self.data.update(fields)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class DeckBuilder:
+    """Builds decks for many documents, bounding documents in flight and OpenAI requests in flight"""
+
+    def __init__(self, client: OpenAI, async_client: AsyncOpenAI, output_dir: str,
+                 document_concurrency: int = BATCH_DOCUMENT_CONCURRENCY,
+                 request_concurrency: int = BATCH_REQUEST_CONCURRENCY,
+                 audio: bool = True, force: bool = False):
+        self.async_client = async_client
+        self.voice_agent = SimpleVoiceAgent(openai_client=client)
+        self.output_dir = output_dir
+        self.documents = asyncio.Semaphore(document_concurrency)
+        self.requests = asyncio.Semaphore(request_concurrency)
+        self.audio = audio
+        self.force = force
+        self.results = Counter()
+
+    async def build_all(self, pdf_paths: List[str]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Identical files are processed once
+        hashes = await asyncio.gather(*(asyncio.to_thread(file_hash, path) for path in pdf_paths))
+        unique = {}
+        for document_hash, path in zip(hashes, pdf_paths):
+            unique.setdefault(document_hash, path)
+        if len(unique) < len(pdf_paths):
+            print(f"🔁 Skipping {len(pdf_paths) - len(unique)} duplicate files")
+        try:
+            await asyncio.gather(*(self.build(path, document_hash) for document_hash, path in unique.items()))
+        finally:
+            # Pooled file-search assistants and queued threads would otherwise outlive the run on the account
+            await assistant_pool.close_async(self.async_client)
+
+    async def build(self, pdf_path: str, document_hash: str) -> None:
+        checkpoint = Checkpoint(os.path.join(self.output_dir, f"{document_hash}.json"), pdf_path, document_hash)
+        name = os.path.basename(pdf_path)
+        if checkpoint["complete"] and not self.force:
+            print(f"⏭️ Already built: {name}")
+            self.results["skipped"] += 1
+            return
+        async with self.documents:
+            current_document.set(document_hash)
+            started = time.perf_counter()
+            try:
+                await self.run_stages(pdf_path, checkpoint)
+                checkpoint.save(complete=True, build_seconds=round(time.perf_counter() - started, 2))
+                print(f"✅ Built {len(checkpoint['slides'])} slides for {name} in {time.perf_counter() - started:.1f}s")
+                self.results["built"] += 1
+            except Exception as e:
+                print(f"❌ Failed to build {name}: {e}")
+                self.results["failed"] += 1
+
+    async def run_stages(self, pdf_path: str, checkpoint: Checkpoint) -> None:
+        if checkpoint["slides"] is None or self.force:
+            if checkpoint["qa_pairs"] is None or self.force:
+                extracted = await asyncio.to_thread(extract_pdf_pages, pdf_path)
+                # Indexing and summarizing are independent, so they run side by side
+                index, summary = await asyncio.gather(
+                    self.index(pdf_path, extracted, checkpoint),
+                    self.summarize(pdf_path, extracted, checkpoint)
+                )
+                qa_pairs = await self.generate_qa_pairs(summary, index)
+                checkpoint.save(qa_pairs=qa_pairs)
+            summary = DocumentSummary(**checkpoint["summary"])
+            async with self.requests:
+                slides = await generate_slides_from_qa_pairs_async(self.async_client, checkpoint["qa_pairs"], summary)
+            checkpoint.save(slides=[slide.model_dump() for slide in slides])
+
+        if self.audio:
+            slides = [SlideContent(**slide) for slide in checkpoint["slides"]]
+            narrated = await asyncio.gather(*(self.narrate(slide) for slide in slides))
+            checkpoint.save(narrated_slides=sum(narrated))
+
+    async def index(self, pdf_path: str, extracted, checkpoint: Checkpoint):
+        """Vector store id, or the local retrieval index for the local backends"""
+        if RETRIEVAL_BACKEND in LOCAL_RETRIEVAL_BACKENDS:
+            if RETRIEVAL_BACKEND == "dense":
+                # Embeddings are cached on disk by document hash, so a resumed run doesn't re-embed
+                embedder = create_embedder(self.voice_agent.openai_client)
+                return await asyncio.to_thread(EmbeddingIndex.load_or_build, checkpoint["document_hash"], extracted, embedder)
+            return LocalRetrievalIndex.from_extracted(extracted)
+        if checkpoint["vector_store_id"] and not self.force:
+            return checkpoint["vector_store_id"]
+        async with self.requests:
+            store = await create_vector_store_async(self.async_client, f"document_store_{checkpoint['document_hash'][:16]}")
+        if not (store and "id" in store):
+            raise RuntimeError("Failed to create vector store")
+        async with self.requests:
+            upload = await upload_single_pdf_async(self.async_client, pdf_path, store["id"])
+        if upload["status"] != "success":
+            raise RuntimeError(f"PDF upload to vector store failed: {upload.get('error', 'Unknown error')}")
+        checkpoint.save(vector_store_id=store["id"])
+        return store["id"]
+
+    async def summarize(self, pdf_path: str, extracted, checkpoint: Checkpoint) -> DocumentSummary:
+        if checkpoint["summary"] and not self.force:
+            return DocumentSummary(**checkpoint["summary"])
+        # The summary helper takes the shared semaphore per call, so it is not wrapped here
+        summary = await generate_summary_async(self.async_client, pdf_path, extracted, semaphore=self.requests)
+        checkpoint.save(summary=summary.model_dump())
+        return summary
+
+    async def generate_qa_pairs(self, summary: DocumentSummary, index) -> List[dict]:
+        # The Q&A helpers take the shared semaphore per request, so they are not wrapped here
+        if isinstance(index, str):
+            return await generate_qa_pairs_from_document_async(self.async_client, summary, index, semaphore=self.requests)
+        return await generate_qa_pairs_from_local_index_async(
+            self.async_client, summary, index,
+            extractive=RETRIEVAL_BACKEND == "extractive",
+            semaphore=self.requests
+        )
+
+    async def narrate(self, slide: SlideContent) -> bool:
+        """Synthesize a slide into the audio cache; already cached audio costs no request"""
+        try:
+            async with self.requests:
+                await self.voice_agent.synthesize_audio(narration_text(slide), BATCH_NARRATION_VOICE)
+            return True
+        except Exception as e:
+            print(f"⚠️ Narration failed for slide {slide.slide_number}: {e}")
+            return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build slide decks and narration for a directory or manifest of PDFs")
+    parser.add_argument("source", help="Directory of PDFs, or a manifest file with one PDF path per line")
+    parser.add_argument("--output", default=BATCH_OUTPUT_DIR, help=f"Checkpoint directory (default: {BATCH_OUTPUT_DIR})")
+    parser.add_argument("--documents", type=int, default=BATCH_DOCUMENT_CONCURRENCY, help="Documents processed at once")
+    parser.add_argument("--requests", type=int, default=BATCH_REQUEST_CONCURRENCY, help="OpenAI requests in flight across all documents")
+    parser.add_argument("--no-audio", action="store_true", help="Skip narration audio")
+    parser.add_argument("--force", action="store_true", help="Rebuild documents that already have a complete checkpoint")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("OPENAI_API_KEY"):
+        parser.error("Set OPENAI_API_KEY to build decks")
+
+    pdf_paths = find_pdfs(args.source)
+    print(f"📚 Building decks for {len(pdf_paths)} PDFs ({args.documents} documents, {args.requests} requests at a time)")
+
+    client = OpenAI(http_client=DefaultHttpxClient(event_hooks={"request": [count_api_call]}))
+    async_client = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(event_hooks={"request": [count_api_call_async]}))
+    builder = DeckBuilder(client, async_client, args.output, args.documents, args.requests,
+                          audio=not args.no_audio, force=args.force)
+
+    start = time.perf_counter()
+    asyncio.run(builder.build_all(pdf_paths))
+    minutes = (time.perf_counter() - start) / 60
+
+    processed = builder.results["built"] + builder.results["failed"]
+    calls = sum(api_calls.values())
+    print(f"\n📊 Built {builder.results['built']}, skipped {builder.results['skipped']}, failed {builder.results['failed']} "
+          f"in {minutes * 60:.1f}s")
+    if processed:
+        print(f"   {processed / minutes:.1f} docs/min, {calls} API calls ({calls / processed:.1f} per doc)")
+    budget = budget_stats.stats()
+    if budget["tokens_saved"]:
+        print(f"   ✂️ Trimmed {budget['trimmed']} of {budget['prompts']} prompts, saving {budget['tokens_saved']} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # Data models
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class SlideContent(BaseModel):
     title: str
@@ -63,4 +63,17 @@ class UploadResult(BaseModel):
     generatedSlides: int
     detectedLanguage: str
     complexity: str
-    extractedText: str  # Full text content
\ No newline at end of file
+    extractedText: str  # Full text content
+    jobId: Optional[str] = None  # Background job running the AI stages
+    jobStatus: Optional[str] = None  # "queued", "running", "completed", "failed"
+    sessionId: Optional[str] = None  # Session the document was loaded into (X-Session-Id header)
+
+class UploadJobStatus(BaseModel):
+    jobId: str
+    filename: str
+    status: str  # "queued", "running", "completed", "failed"
+    stage: str  # "extracting", "indexing", "summarizing", "done"
+    stages: Dict[str, str]  # stage -> "pending", "running", "done", "skipped", "failed"
+    error: Optional[str] = None
+    stageTimings: Dict[str, float] = {}  # stage -> seconds; stages run concurrently where they can
+    elapsedTime: str
\ No newline at end of file
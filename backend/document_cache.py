@@ -0,0 +1,103 @@
+# Content-addressed cache of processed documents
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from data_models import DocumentSummary, UploadResult
+from slide_deck import EMPTY_DECK, SlideDeck
+
+# Cache limits (override with environment variables)
+DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "32"))
+DOCUMENT_CACHE_MAX_AGE_SECONDS = float(os.getenv("DOCUMENT_CACHE_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+
+
+def new_content_hasher():
+    """Return the incremental hasher whose hex digest keys the cache, fed as an upload streams in"""
+    return hashlib.sha256()
+
+
+@dataclass
+class CachedDocument:
+    """Artifacts produced by the AI pipeline for one PDF"""
+    document_hash: str
+    filename: str
+    vector_store_id: Optional[str] = None
+    retrieval_index: Optional[Any] = None  # LocalRetrievalIndex when an offline backend is configured
+    summary: Optional[DocumentSummary] = None
+    upload_result: Optional[UploadResult] = None
+    qa_pairs: List[dict] = field(default_factory=list)
+    deck: SlideDeck = EMPTY_DECK
+    created_at: float = field(default_factory=time.time)
+
+
+class DocumentCache:
+    """LRU cache of processed documents keyed by PDF content hash, with age-based expiry"""
+
+    def __init__(self, max_entries: int = DOCUMENT_CACHE_MAX_ENTRIES, max_age_seconds: float = DOCUMENT_CACHE_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_expired(self, entry: CachedDocument, now: float) -> bool:
+        return self.max_age_seconds > 0 and now - entry.created_at > self.max_age_seconds
+
+    def get(self, document_hash: str) -> Optional[CachedDocument]:
+        """Return the cached document for a hash, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(document_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self._is_expired(entry, time.time()):
+                del self._entries[document_hash]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(document_hash)
+            self.hits += 1
+            return entry
+
+    def put(self, entry: CachedDocument) -> None:
+        """Store a processed document, evicting expired and least recently used entries"""
+        with self._lock:
+            self._entries[entry.document_hash] = entry
+            self._entries.move_to_end(entry.document_hash)
+            self._evict()
+
+    def update(self, document_hash: str, **fields) -> Optional[CachedDocument]:
+        """Attach newly generated artifacts (qa_pairs, deck, ...) to an existing entry"""
+        with self._lock:
+            entry = self._entries.get(document_hash)
+            if entry is None:
+                return None
+            for name, value in fields.items():
+                setattr(entry, name, value)
+            return entry
+
+    def _evict(self) -> None:
+        now = time.time()
+        for document_hash in [h for h, e in self._entries.items() if self._is_expired(e, now)]:
+            del self._entries[document_hash]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,202 @@
+# Dense chunk retrieval over memory-mapped NumPy embedding matrices
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from local_retrieval import Chunk, LOCAL_RETRIEVAL_TOP_K, chunk_pages, tokenize
+from pdf_extraction import ExtractedPdf
+
+# Index settings (override with environment variables)
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", os.path.join(tempfile.gettempdir(), "document_embeddings"))
+EMBEDDING_INDEX_MAX_MB = int(os.getenv("EMBEDDING_INDEX_MAX_MB", "512"))
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing").lower()  # "hashing" (offline) or "openai"
+HASHING_EMBEDDING_DIM = 512
+OPENAI_EMBEDDING_DIMS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+
+# An embedder maps a list of texts to a (len(texts), dim) float32 matrix of unit vectors
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder over unigrams and bigrams, for offline use and tests"""
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, (1.0 if value >> 63 else -1.0)
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                column, sign = self._bucket(feature)
+                matrix[row, column] += sign
+        return _normalize(matrix)
+
+
+class OpenAIEmbedder:
+    """Embedder backed by the OpenAI embeddings endpoint (sync client)"""
+
+    def __init__(self, client, model: str = "text-embedding-3-small", batch_size: int = 256):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.dim = OPENAI_EMBEDDING_DIMS.get(model, 1536)
+        self.name = f"openai-{model}"
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model, input=texts[start:start + self.batch_size])
+            vectors.extend(item.embedding for item in response.data)
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def create_embedder(client=None) -> Embedder:
+    """Return the embedder selected by EMBEDDING_BACKEND"""
+    if EMBEDDING_BACKEND == "openai" and client is not None:
+        return OpenAIEmbedder(client)
+    return HashingEmbedder()
+
+
+class EmbeddingIndex:
+    """Top-k chunk retrieval by cosine similarity over a (chunks, dim) float32 matrix
+
+    The matrix is stored as `<document_hash>.npy` and opened with mmap_mode="r",
+    so loading an index costs no reads until it is queried. Files are written
+    through temp files and os.replace, so a concurrent load never sees a partial
+    index, and the least recently used indexes are deleted once the directory
+    exceeds EMBEDDING_INDEX_MAX_MB.
+    """
+
+    def __init__(self, matrix: np.ndarray, chunks: List[Chunk], embedder: Embedder):
+        self.matrix = matrix
+        self.chunks = chunks
+        self.embedder = embedder
+
+    @staticmethod
+    def _paths(document_hash: str, directory: str) -> Tuple[str, str]:
+        base = os.path.join(directory, document_hash)
+        return f"{base}.npy", f"{base}.chunks.json"
+
+    @classmethod
+    def build(cls, document_hash: str, chunks: List[Chunk], embedder: Embedder, directory: str = EMBEDDING_INDEX_DIR) -> "EmbeddingIndex":
+        """Embed chunks, write the matrix and chunk metadata to disk and return the mapped index"""
+        os.makedirs(directory, exist_ok=True)
+        matrix_path, chunks_path = cls._paths(document_hash, directory)
+        matrix = np.ascontiguousarray(embedder([chunk.text for chunk in chunks]), dtype=np.float32)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix)
+        os.replace(temp_path, matrix_path)
+        # The metadata goes last: load needs both files, so it only ever pairs it with this matrix
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "embedder": getattr(embedder, "name", type(embedder).__name__),
+                "chunks": [[chunk.page, chunk.text] for chunk in chunks]
+            }, f)
+        os.replace(temp_path, chunks_path)
+        cls.evict(directory, keep=document_hash)
+        return cls.load(document_hash, embedder, directory)
+
+    @classmethod
+    def load(cls, document_hash: str, embedder: Embedder, directory: str = EMBEDDING_INDEX_DIR) -> Optional["EmbeddingIndex"]:
+        """Open a stored index, or return None if missing or built with a different embedder"""
+        matrix_path, chunks_path = cls._paths(document_hash, directory)
+        try:
+            with open(chunks_path) as f:
+                metadata = json.load(f)
+            if metadata.get("embedder") != getattr(embedder, "name", type(embedder).__name__):
+                return None
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None  # Missing, or evicted while loading
+        chunks = [Chunk(i, page, text) for i, (page, text) in enumerate(metadata["chunks"])]
+        if matrix.shape[0] != len(chunks):
+            return None  # Matrix of another build, replaced between the two reads
+        for path in (matrix_path, chunks_path):
+            try:
+                os.utime(path)  # Mark as recently used for eviction
+            except OSError:
+                pass
+        return cls(matrix, chunks, embedder)
+
+    @classmethod
+    def evict(cls, directory: str = EMBEDDING_INDEX_DIR, max_bytes: int = EMBEDDING_INDEX_MAX_MB * 1024 * 1024,
+              keep: Optional[str] = None) -> int:
+        """Delete least recently used indexes until the directory fits max_bytes; returns how many were deleted"""
+        indexes = {}  # document hash -> [last used, bytes]
+        for name in os.listdir(directory):
+            document_hash, _, suffix = name.partition(".")
+            if suffix not in ("npy", "chunks.json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            entry = indexes.setdefault(document_hash, [0.0, 0])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+        total = sum(size for _, size in indexes.values())
+        evicted = 0
+        for _, size, document_hash in sorted((used, size, h) for h, (used, size) in indexes.items()):
+            if total <= max_bytes:
+                break
+            if document_hash == keep:
+                continue
+            # Open indexes keep working: their matrix stays mapped until they are dropped
+            for path in cls._paths(document_hash, directory):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Already gone
+            total -= size
+            evicted += 1
+        if evicted:
+            print(f"🧹 Evicted {evicted} embedding indexes to fit {max_bytes // (1024 * 1024)} MB")
+        return evicted
+
+    @classmethod
+    def load_or_build(cls, document_hash: str, extracted: ExtractedPdf, embedder: Embedder, directory: str = EMBEDDING_INDEX_DIR) -> "EmbeddingIndex":
+        return cls.load(document_hash, embedder, directory) or cls.build(document_hash, chunk_pages(extracted), embedder, directory)
+
+    def size_bytes(self) -> int:
+        """Approximate memory held: the chunk text (the matrix is memory-mapped from disk)"""
+        return sum(len(chunk.text) for chunk in self.chunks)
+
+    def search_batch(self, queries: List[str], top_k: int = LOCAL_RETRIEVAL_TOP_K) -> List[List[Tuple[Chunk, float]]]:
+        """Return the top_k chunks for every query, best first, from one matrix product"""
+        if not queries or not self.chunks:
+            return [[] for _ in queries]
+        scores = self.embedder(queries) @ self.matrix.T  # (queries, chunks)
+        k = min(top_k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(self.chunks[i], float(scores[row, i])) for i in ordered])
+        return results
+
+    def search(self, query: str, top_k: int = LOCAL_RETRIEVAL_TOP_K) -> List[Tuple[Chunk, float]]:
+        return self.search_batch([query], top_k)[0]
+
+    def __len__(self) -> int:
+        return len(self.chunks)
@@ -0,0 +1,115 @@
+# In-process broadcast of live updates to Server-Sent Events subscribers
+import asyncio
+import itertools
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Deque, Iterable, List, Optional, Set, Tuple
+
+from data_models import LiveUpdate
+
+# Hub settings (override with environment variables)
+LIVE_UPDATE_QUEUE_SIZE = int(os.getenv("LIVE_UPDATE_QUEUE_SIZE", "64"))
+LIVE_UPDATE_HISTORY = int(os.getenv("LIVE_UPDATE_HISTORY", "50"))
+LIVE_UPDATE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_UPDATE_KEEPALIVE_SECONDS", "15"))
+
+
+def live_update(message: str, type: str = "info") -> LiveUpdate:
+    """Create a LiveUpdate stamped with the current UTC time"""
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return LiveUpdate(message=message, timestamp=timestamp, type=type)
+
+
+class Subscriber:
+    """One SSE client: a bounded queue of (event id, update); None marks a dropped subscriber"""
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[Optional[Tuple[int, LiveUpdate]]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class LiveUpdateHub:
+    """Fans each published update out to every subscriber's queue
+
+    A subscriber whose queue is full is a slow consumer: it is dropped (its
+    stream ends and the client reconnects with Last-Event-ID) so it can never
+    hold memory or slow down publishing. Recent updates are kept for replay.
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, history: int = LIVE_UPDATE_HISTORY, queue_size: int = LIVE_UPDATE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history: Deque[Tuple[int, LiveUpdate]] = deque(maxlen=history)
+        self._subscribers: Set[Subscriber] = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def seed(self, updates: Iterable[LiveUpdate]) -> None:
+        for update in updates:
+            self._history.append((next(self._ids), update))
+
+    def publish(self, update: LiveUpdate) -> int:
+        """Queue an update for every subscriber; returns how many received it"""
+        event = (next(self._ids), update)
+        self._history.append(event)
+        self.published += 1
+        delivered = 0
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+        return delivered
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped_subscribers += 1
+        # Make room for the end-of-stream marker so the stream wakes up and closes
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        print("⚠️ Dropped slow live-update subscriber")
+
+    def history(self) -> List[LiveUpdate]:
+        return [update for _, update in self._history]
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        """Register a subscriber, queueing missed history (after last_event_id, or all of it)"""
+        subscriber = Subscriber(self.queue_size)
+        missed = [event for event in self._history if last_event_id is None or event[0] > last_event_id]
+        for event in missed[-self.queue_size:]:
+            subscriber.queue.put_nowait(event)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, last_event_id: Optional[int] = None,
+                     keepalive_seconds: float = LIVE_UPDATE_KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+        """Yield updates as SSE frames until the client disconnects or is dropped"""
+        subscriber = self.subscribe(last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"  # Keeps proxies from closing idle connections
+                    continue
+                if event is None:
+                    return
+                event_id, update = event
+                yield f"id: {event_id}\nevent: live-update\ndata: {update.model_dump_json()}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers
+        }
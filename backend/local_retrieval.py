@@ -0,0 +1,110 @@
+# Offline BM25 retrieval over extracted PDF text
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from pdf_extraction import ExtractedPdf
+
+# "openai" (vector store + file search), "local" (BM25 context + one chat call per
+# question), "dense" (embedding index context + one chat call per question) or
+# "extractive" (BM25 passages only, no model call)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "openai").lower()
+LOCAL_RETRIEVAL_BACKENDS = ("local", "dense", "extractive")
+LOCAL_RETRIEVAL_TOP_K = int(os.getenv("LOCAL_RETRIEVAL_TOP_K", "4"))
+CHUNK_MAX_CHARS = 1200
+POSTING_BYTES = 72  # A (chunk_id, count) tuple plus its list slot
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by does for from how in is it its of on or that the this to was were what when "
+    "which who why with".split()
+)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    chunk_id: int
+    page: int  # 1-based page number
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _paragraphs(page_text: str) -> List[str]:
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", page_text) if p.strip()]
+    # PyPDF2 often emits one line per text row with no blank lines; fall back to lines
+    if len(paragraphs) <= 1:
+        paragraphs = [line.strip() for line in page_text.splitlines() if line.strip()]
+    return paragraphs
+
+
+def chunk_pages(extracted: ExtractedPdf, max_chars: int = CHUNK_MAX_CHARS) -> List[Chunk]:
+    """Split each page into chunks of whole paragraphs of up to max_chars characters"""
+    chunks = []
+    for page_number, page_text in enumerate(extracted.page_texts, 1):
+        current: List[str] = []
+        current_len = 0
+        for paragraph in _paragraphs(page_text):
+            if current and current_len + len(paragraph) > max_chars:
+                chunks.append(Chunk(len(chunks), page_number, " ".join(current)))
+                current, current_len = [], 0
+            current.append(paragraph)
+            current_len += len(paragraph) + 1
+        if current:
+            chunks.append(Chunk(len(chunks), page_number, " ".join(current)))
+    return chunks
+
+
+class LocalRetrievalIndex:
+    """In-memory inverted index over document chunks with BM25 scoring"""
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.chunk_lengths: List[int] = []
+        for chunk in chunks:
+            term_counts = Counter(tokenize(chunk.text))
+            self.chunk_lengths.append(sum(term_counts.values()))
+            for term, count in term_counts.items():
+                self.postings[term].append((chunk.chunk_id, count))
+        self.average_length = (sum(self.chunk_lengths) / len(chunks)) if chunks else 0.0
+        self.idf = {
+            term: math.log(1 + (len(chunks) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_extracted(cls, extracted: ExtractedPdf, max_chars: int = CHUNK_MAX_CHARS) -> "LocalRetrievalIndex":
+        return cls(chunk_pages(extracted, max_chars))
+
+    def size_bytes(self) -> int:
+        """Approximate memory held: chunk text plus one (chunk_id, count) tuple per posting"""
+        postings = sum(len(entries) for entries in self.postings.values())
+        return sum(len(chunk.text) for chunk in self.chunks) + POSTING_BYTES * postings
+
+    def search(self, query: str, top_k: int = LOCAL_RETRIEVAL_TOP_K) -> List[Tuple[Chunk, float]]:
+        """Return the top_k chunks for a query with their BM25 scores, best first"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for chunk_id, count in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.chunk_lengths[chunk_id] / (self.average_length or 1))
+                scores[chunk_id] += idf * count * (self.k1 + 1) / (count + norm)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.chunks[chunk_id], score) for chunk_id, score in best]
+
+    def search_batch(self, queries: List[str], top_k: int = LOCAL_RETRIEVAL_TOP_K) -> List[List[Tuple[Chunk, float]]]:
+        return [self.search(query, top_k) for query in queries]
+
+    def __len__(self) -> int:
+        return len(self.chunks)
@@ -1,19 +1,36 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.encoders import jsonable_encoder
+from typing import AsyncIterator, List, Optional, Tuple, Union
 import uvicorn
-import PyPDF2
-import io
+import asyncio
 import time
 import os
+import shutil
+import json
 import tempfile
 from datetime import datetime
-from openai import OpenAI
-from data_models import SlideContent, LiveUpdate, DocumentSummary, UploadResult
-from parsing_info_from_pdfs import upload_single_pdf, generate_summary, create_vector_store, generate_qa_pairs_from_document, generate_slides_from_qa_pairs
+from openai import OpenAI, AsyncOpenAI
+from data_models import SlideContent, LiveUpdate, DocumentSummary, UploadResult, UploadJobStatus
+from parsing_info_from_pdfs import (
+    upload_single_pdf_async, generate_summary_async, fallback_summary, create_vector_store_async,
+    generate_qa_pairs_from_document_async, generate_slides_from_qa_pairs_async,
+    generate_qa_pairs_from_local_index_async, stream_slides_from_qa_pairs_async
+)
+from local_retrieval import LocalRetrievalIndex, RETRIEVAL_BACKEND, LOCAL_RETRIEVAL_BACKENDS
+from embedding_index import EmbeddingIndex, create_embedder
+from document_cache import DocumentCache, CachedDocument, new_content_hasher
+from pdf_extraction import ExtractedPdf, extract_pdf_pages
+from upload_jobs import UploadJob, UploadJobRegistry, Stage, run_stages
+from assistant_pool import assistant_pool
+from session_store import SessionStore, DeckSession, DEFAULT_SESSION_ID
+from audio_cache import audio_cache, audio_cache_key
+from narration_queue import DeckNarrator
+from slide_deck import SlideDeck, EMPTY_DECK, narration_text
+from live_updates import LiveUpdateHub, live_update
+from prompt_budget import budget_stats
 from dotenv import load_dotenv
-from fastapi.responses import JSONResponse, StreamingResponse
-from io import BytesIO
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 
 load_dotenv()
 
@@ -22,17 +39,64 @@ app = FastAPI(title="Are You Taking Notes API", version="1.0.0")
 # Initialize OpenAI client
 # You'll need to set OPENAI_API_KEY environment variable
 openai_client = None
-vector_store_id = None
-current_document_summary = None  # Store the latest generated summary
-current_qa_pairs = []  # Store the latest generated Q&A pairs
+async_openai_client = None  # Used by the async pipeline so requests never block the event loop
+
+# Per-client document, Q&A, slides and audio, selected by the X-Session-Id header
+session_store = SessionStore()
+
+# Processed documents keyed by PDF content hash, so re-uploads skip the AI pipeline
+document_cache = DocumentCache()
+
+# Background jobs running the AI stages of uploads
+upload_jobs = UploadJobRegistry()
 
 try:
     openai_client = OpenAI()  # Will use OPENAI_API_KEY from environment
+    async_openai_client = AsyncOpenAI()
     print("✅ OpenAI client initialized successfully")
 except Exception as e:
     print(f"⚠️  OpenAI client not initialized: {e}")
     print("Set OPENAI_API_KEY environment variable to enable AI features")
 
+# Upload limits (override with environment variables)
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "250"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Types accepted by POST /api/live-updates
+LIVE_UPDATE_TYPES = ("info", "question", "announcement")
+
+# Voice used for slide narration (part of the audio cache key)
+SLIDE_NARRATION_VOICE = "alloy"
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_STREAMING = os.getenv("TTS_STREAMING", "true").lower() == "true"  # Forward on-demand audio as it is synthesized
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads whose declared size exceeds the limit before the body is read"""
+    if request.url.path == "/api/upload":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_CHUNK_BYTES:
+            return JSONResponse(status_code=413, content={"detail": f"File size must be less than {MAX_UPLOAD_MB}MB"})
+    return await call_next(request)
+
+# Background task deleting idle file-search assistants
+assistant_reaper: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_assistant_reaper():
+    global assistant_reaper
+    if async_openai_client:
+        assistant_reaper = asyncio.create_task(assistant_pool.reap_periodically(async_openai_client))
+
+@app.on_event("shutdown")
+async def close_assistant_pool():
+    """Delete pooled file-search assistants and pending threads on shutdown"""
+    if assistant_reaper:
+        assistant_reaper.cancel()
+    if async_openai_client:
+        await assistant_pool.close_async(async_openai_client)
+
 # Enable CORS for Next.js frontend
 app.add_middleware(
     CORSMiddleware,
@@ -42,12 +106,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Generated slides storage (starts empty, populated after document upload and slide generation)
-sample_slides = []
-
-# Audio storage for slides (maps slide_number to audio file path)
-slide_audio_cache = {}
-
 sample_live_updates = [
     LiveUpdate(
         message="Welcome everyone! We'll start in 2 minutes.",
@@ -61,6 +119,10 @@ sample_live_updates = [
     )
 ]
 
+# Broadcasts live updates to SSE subscribers; starts with the sample announcements
+live_updates = LiveUpdateHub()
+live_updates.seed(sample_live_updates)
+
 sample_document_summary = DocumentSummary(
     title="Building Intelligent Agents with Claude on Vertex AI",
     abstract="This comprehensive guide explores the integration of Anthropic's Claude language model with Google Cloud's Vertex AI platform to create powerful, context-aware intelligent agents. The document covers the Model Context Protocol (MCP), implementation strategies, and best practices for deploying Claude-based agents in production environments.",
@@ -87,54 +149,138 @@ sample_document_summary = DocumentSummary(
 )
 
 # Helper Functions
-async def generate_audio_for_all_slides(slides: List[SlideContent]) -> None:
-    """Generate audio files for all slides and cache them"""
-    global slide_audio_cache, openai_client
-    
+def get_session(x_session_id: Optional[str] = Header(None)) -> DeckSession:
+    """Resolve the caller's session from the X-Session-Id header (shared default session otherwise)"""
+    return session_store.get_or_create(x_session_id or DEFAULT_SESSION_ID)
+
+def create_slide_narrator(session: DeckSession) -> Optional[DeckNarrator]:
+    """Start an empty background narrator for the session (replacing any running one); slides are added as they exist"""
     if not openai_client:
         print("⚠️ OpenAI client not available, skipping audio generation")
-        return
+        return None
+    
+    from voice_agent import SimpleVoiceAgent
+    voice_agent = SimpleVoiceAgent(openai_client, session)
+    
+    async def narrate(slide: SlideContent) -> bool:
+        try:
+            await voice_agent.synthesize_audio(narration_text(slide), SLIDE_NARRATION_VOICE)
+        except Exception as e:
+            print(f"❌ Error generating audio for slide {slide.slide_number}: {e}")
+            return False
+        print(f"✅ Generated audio for slide {slide.slide_number}: {slide.title}")
+        return True
     
-    print(f"🎙️ Generating audio for {len(slides)} slides...")
-    slide_audio_cache.clear()  # Clear previous audio cache
+    def announce(narrator: DeckNarrator) -> None:
+        done = sum(1 for status in narrator.status.values() if status == "done")
+        print(f"🎉 Audio generation complete! Generated audio for {done}/{len(narrator.status)} slides")
+        live_updates.publish(live_update(f"Narration is ready for {done} of {len(narrator.status)} slides"))
+    
+    if session.narrator:
+        session.narrator.cancel()
+    session.narrator = DeckNarrator(narrate, TTS_MAX_CONCURRENCY, on_complete=announce)
+    return session.narrator
+
+def generate_audio_for_all_slides(session: DeckSession, deck: SlideDeck) -> Optional[DeckNarrator]:
+    """Start synthesizing audio for all slides in the background (slide 1 first, TTS_MAX_CONCURRENCY at once)"""
+    narrator = create_slide_narrator(session)
+    if narrator:
+        print(f"🎙️ Generating audio for {len(deck)} slides of deck v{deck.version} in the background ({TTS_MAX_CONCURRENCY} at a time)...")
+        for slide in sorted(deck, key=lambda slide: slide.slide_number):
+            narrator.add(slide)
+        narrator.close()
+    return narrator
+
+async def prime_audio_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Wait for the first audio chunk before responding, so synthesis errors still become HTTP errors"""
+    first_chunk = b""
+    async for first_chunk in chunks:
+        if first_chunk:
+            break
+    if not first_chunk:
+        raise HTTPException(status_code=500, detail="Failed to generate audio content")
+    
+    async def relay() -> AsyncIterator[bytes]:
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    return relay()
+
+def parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into inclusive (start, end) offsets
     
+    Returns None for headers we serve in full (other units, multiple ranges) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
     try:
-        from voice_agent import SimpleVoiceAgent
-        voice_agent = SimpleVoiceAgent(openai_client)
-        
-        for slide in slides:
-            try:
-                # Generate narration text
-                narration_text = f"{slide.title}. {slide.content}"
-                
-                # Generate audio
-                audio_content = await voice_agent.generate_audio(narration_text)
-                
-                if audio_content:
-                    # Store audio in memory cache (in production, you might save to files)
-                    slide_audio_cache[slide.slide_number] = audio_content
-                    print(f"✅ Generated audio for slide {slide.slide_number}: {slide.title}")
-                else:
-                    print(f"⚠️ Failed to generate audio for slide {slide.slide_number}")
-                    
-            except Exception as e:
-                print(f"❌ Error generating audio for slide {slide.slide_number}: {e}")
-                
-        print(f"🎉 Audio generation complete! Generated audio for {len(slide_audio_cache)} slides")
-        
-    except Exception as e:
-        print(f"❌ Audio generation failed: {e}")
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start, end = size - int(end_text), size - 1  # Suffix range: the last N bytes
+    except ValueError:
+        return None
+    start, end = max(0, start), min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError(f"Range {range_header} not satisfiable for {size} bytes")
+    return start, end
 
-def get_slide_audio(slide_number: int) -> Optional[bytes]:
-    """Get cached audio for a specific slide"""
-    return slide_audio_cache.get(slide_number)
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
 
-def clear_slide_cache():
-    """Clear all cached slides and audio"""
-    global sample_slides, slide_audio_cache
-    sample_slides.clear()
-    slide_audio_cache.clear()
-    print("🧹 Cleared slide and audio cache")
+def audio_file_response(request: Request, audio: bytes, filename: str, cache_key: str) -> Response:
+    """Serve complete audio with conditional GET and byte-range support
+
+    The audio cache key already hashes the narration text, voice and model, so it
+    doubles as the ETag. Voice URLs aren't versioned (a new deck changes what
+    /api/slides/{n}/voice returns), so clients must revalidate on every use.
+    """
+    etag = f'"{cache_key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "X-Session-Id",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_byte_range(range_header, len(audio))
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(audio)}"})
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+            return Response(audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+    
+    return Response(audio, media_type="audio/mpeg", headers=headers)
+
+def slide_audio_key(deck: SlideDeck, slide_number: int) -> Optional[str]:
+    """Audio cache key of a slide's narration, or None if the deck has no such slide"""
+    narration = deck.narration(slide_number)
+    return audio_cache_key(narration, SLIDE_NARRATION_VOICE) if narration is not None else None
+
+async def get_slide_audio(deck: SlideDeck, slide_number: int) -> Optional[bytes]:
+    """Get cached audio for a specific slide, reading the disk cache off the event loop"""
+    return await asyncio.to_thread(audio_cache.get, slide_audio_key(deck, slide_number))
+
+def clear_slide_cache(session: DeckSession):
+    """Clear the session's cached slides and audio"""
+    session.clear_slides()
+    print(f"🧹 Cleared slide and audio cache for session {session.session_id}")
 
 # API Endpoints
 @app.get("/")
@@ -142,147 +288,294 @@ async def root():
     return {"message": "Are You Taking Notes API is running!"}
 
 @app.get("/api/slides", response_model=List[SlideContent])
-async def get_slides():
+async def get_slides(session: DeckSession = Depends(get_session)):
     """Get all presentation slides"""
-    return sample_slides
+    return list(session.deck.slides)
 
 @app.get("/api/slides/metadata")
-async def get_slides_metadata():
+async def get_slides_metadata(session: DeckSession = Depends(get_session)):
     """Get slide metadata including total count"""
+    deck = session.deck
     return {
-        "total_slides": len(sample_slides),
-        "available_slides": [slide.slide_number for slide in sample_slides]
+        "total_slides": len(deck),
+        "available_slides": deck.slide_numbers,
+        "deck_version": deck.version
     }
 
 @app.get("/api/slides/{slide_number}", response_model=SlideContent)
-async def get_slide(slide_number: int):
+async def get_slide(slide_number: int, session: DeckSession = Depends(get_session)):
     """Get a specific slide by number"""
-    for slide in sample_slides:
-        if slide.slide_number == slide_number:
-            return slide
+    slide = session.deck.get(slide_number)
+    if slide:
+        return slide
     
     # Return 404 if slide doesn't exist
     raise HTTPException(status_code=404, detail=f"Slide {slide_number} not found")
 
 @app.get("/api/live-updates", response_model=List[LiveUpdate])
 async def get_live_updates():
-    """Get live updates and announcements"""
-    return sample_live_updates
+    """Get recent live updates and announcements"""
+    return live_updates.history()
+
+@app.get("/api/live-updates/stream")
+async def stream_live_updates(last_event_id: Optional[str] = Header(None)):
+    """Push live updates as Server-Sent Events (recent history first, or what was missed since Last-Event-ID)"""
+    resume_after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        live_updates.stream(resume_after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/live-updates")
+async def publish_live_update(request: dict):
+    """Publish a live update to every subscriber"""
+    message = str(request.get("message", "")).strip()
+    update_type = request.get("type", "announcement")
+    
+    if not message:
+        raise HTTPException(status_code=400, detail="Message is required")
+    
+    if update_type not in LIVE_UPDATE_TYPES:
+        raise HTTPException(status_code=400, detail=f"Type must be one of: {', '.join(LIVE_UPDATE_TYPES)}")
+    
+    update = live_update(message, update_type)
+    delivered = live_updates.publish(update)
+    return {"success": True, "update": update, "delivered": delivered}
 
 @app.get("/api/document-summary", response_model=DocumentSummary)
-async def get_document_summary():
-    """Get summary of the document being discussed"""
-    if current_document_summary:
-        return current_document_summary
+async def get_document_summary(session: DeckSession = Depends(get_session)):
+    """Get summary of the document being discussed (waits for a pending upload's AI summary)"""
+    await wait_for_pending_upload(session)
+    if session.document_summary:
+        return session.document_summary
+    if session.document_hash:
+        # The upload job failed; never show the sample summary in place of the uploaded document
+        raise HTTPException(status_code=404, detail="No summary available for the uploaded document")
     return sample_document_summary
 
+async def generate_current_qa_pairs(session: DeckSession) -> List[dict]:
+    """Generate Q&A pairs for the session's document with the configured retrieval backend"""
+    if RETRIEVAL_BACKEND in LOCAL_RETRIEVAL_BACKENDS and session.retrieval_index is not None:
+        return await generate_qa_pairs_from_local_index_async(
+            client=async_openai_client,
+            summary=session.document_summary,
+            index=session.retrieval_index,
+            extractive=RETRIEVAL_BACKEND == "extractive"
+        )
+    return await generate_qa_pairs_from_document_async(
+        client=async_openai_client,
+        summary=session.document_summary,
+        vector_store_id=session.vector_store_id
+    )
+
 @app.post("/api/generate-qa", response_model=List[dict])
-async def generate_qa_pairs(use_current_document: bool = True):
-    """Generate Q&A pairs from the currently uploaded document"""
-    global current_document_summary, vector_store_id, current_qa_pairs
-    
+async def generate_qa_pairs(use_current_document: bool = True, session: DeckSession = Depends(get_session)):
+    """Generate Q&A pairs from the session's uploaded document"""
     if not openai_client:
         raise HTTPException(status_code=500, detail="OpenAI client not configured")
     
-    if not current_document_summary:
-        raise HTTPException(status_code=400, detail="No document summary available. Please upload a document first.")
-    
-    if not vector_store_id:
-        raise HTTPException(status_code=400, detail="No vector store available. Please upload a document first.")
-    
-    try:
-        # Generate Q&A pairs using the document summary and vector store
-        qa_pairs = generate_qa_pairs_from_document(
-            client=openai_client,
-            summary=current_document_summary,
-            vector_store_id=vector_store_id
-        )
+    async with session.lock:
+        await wait_for_pending_upload(session)
         
-        # Store for future use
-        current_qa_pairs = qa_pairs
+        if not session.document_summary:
+            raise HTTPException(status_code=400, detail="No document summary available. Please upload a document first.")
         
-        return qa_pairs
+        if not session.vector_store_id and session.retrieval_index is None:
+            raise HTTPException(status_code=400, detail="No vector store available. Please upload a document first.")
         
-    except Exception as e:
-        print(f"Error generating Q&A pairs: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate Q&A pairs: {str(e)}")
+        document_hash = session.document_hash
+        try:
+            # Generate Q&A pairs using the document summary and the retrieval backend
+            qa_pairs = await generate_current_qa_pairs(session)
+            
+            if session.document_hash != document_hash:
+                raise HTTPException(status_code=409, detail="A new document was uploaded while Q&A pairs were being generated")
+            
+            # Store for future use
+            session.qa_pairs = qa_pairs
+            if document_hash:
+                document_cache.update(document_hash, qa_pairs=qa_pairs, deck=EMPTY_DECK)
+            
+            return qa_pairs
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error generating Q&A pairs: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate Q&A pairs: {str(e)}")
 
 @app.get("/api/qa-pairs", response_model=List[dict])
-async def get_qa_pairs():
-    """Get the current Q&A pairs for the uploaded document"""
-    global current_qa_pairs
-    
-    if not current_qa_pairs:
-        return []
-    
-    return current_qa_pairs
+async def get_qa_pairs(session: DeckSession = Depends(get_session)):
+    """Get the current Q&A pairs for the session's uploaded document"""
+    return session.qa_pairs
 
-@app.post("/api/generate-slides", response_model=List[SlideContent])
-async def generate_slides_from_qa():
-    """Generate slides based on Q&A pairs from the uploaded document (auto-generates Q&A if needed)"""
-    global openai_client, current_document_summary, current_qa_pairs, vector_store_id
-    
-    print(f"🔄 Generate slides request received")
+def check_slide_generation_ready(session: DeckSession) -> None:
+    """Log the session state and raise if slides cannot be generated yet"""
     print(f"📊 Current state:")
     print(f"   - OpenAI client: {'✅ Available' if openai_client else '❌ Not configured'}")
-    print(f"   - Document summary: {'✅ Available' if current_document_summary else '❌ None'}")
-    print(f"   - Q&A pairs: {'✅ Available' if current_qa_pairs else '❌ None'} ({len(current_qa_pairs) if current_qa_pairs else 0} pairs)")
-    print(f"   - Vector store: {'✅ Available' if vector_store_id else '❌ None'}")
+    print(f"   - Document summary: {'✅ Available' if session.document_summary else '❌ None'}")
+    print(f"   - Q&A pairs: {'✅ Available' if session.qa_pairs else '❌ None'} ({len(session.qa_pairs)} pairs)")
+    print(f"   - Vector store: {'✅ Available' if session.vector_store_id else '❌ None'}")
+    print(f"   - Retrieval backend: {RETRIEVAL_BACKEND}")
     
     if not openai_client:
         error_msg = "OpenAI client not configured. Please check OPENAI_API_KEY environment variable."
         print(f"❌ {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
     
-    if not current_document_summary:
+    if not session.document_summary:
         error_msg = "No document summary available. Please upload a PDF document first."
         print(f"❌ {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
     
-    if not vector_store_id:
+    if not session.vector_store_id and session.retrieval_index is None:
         error_msg = "No vector store available. Please upload a PDF document first."
         print(f"❌ {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
-    
-    try:
-        # Step 1: Generate Q&A pairs if they don't exist
-        if not current_qa_pairs:
-            print(f"🔄 No Q&A pairs found, generating them first...")
-            current_qa_pairs = generate_qa_pairs_from_document(
-                client=openai_client,
-                summary=current_document_summary,
-                vector_store_id=vector_store_id
-            )
-            print(f"✅ Generated {len(current_qa_pairs)} Q&A pairs")
-        else:
-            print(f"✅ Using existing {len(current_qa_pairs)} Q&A pairs")
-        
-        # Step 2: Generate slides using Q&A pairs
-        print(f"🎯 Generating slides from {len(current_qa_pairs)} Q&A pairs...")
-        print(f"📄 Document: {current_document_summary.title}")
-        
-        slides = generate_slides_from_qa_pairs(
-            client=openai_client,
-            qa_pairs=current_qa_pairs,
-            document_summary=current_document_summary
-        )
-        
-        print(f"✅ Generated {len(slides)} slides successfully")
-        
-        # Update the global sample_slides with generated content
-        global sample_slides
-        sample_slides = slides
-        
-        # Step 3: Auto-generate audio for all slides
-        await generate_audio_for_all_slides(slides)
-        
-        return slides
+
+def reuse_cached_deck(session: DeckSession, document_hash: Optional[str]) -> Optional[SlideDeck]:
+    """Publish the deck generated earlier for the same document content and Q&A pairs, if any"""
+    cached_document = document_cache.get(document_hash) if document_hash else None
+    if not (cached_document and cached_document.deck and cached_document.qa_pairs == session.qa_pairs):
+        return None
+    deck = cached_document.deck
+    print(f"⚡ Reusing {len(deck)} cached slides (deck v{deck.version}) for: {cached_document.filename}")
+    session.publish_deck(deck)
+    narration_running = session.narrator is not None and not session.narrator.finished
+    if not narration_running and any(slide_audio_key(deck, number) not in audio_cache for number in deck.slide_numbers):
+        generate_audio_for_all_slides(session, deck)
+    return deck
+
+async def ensure_qa_pairs(session: DeckSession) -> None:
+    """Generate Q&A pairs for the session's document if it has none yet"""
+    if not session.qa_pairs:
+        print(f"🔄 No Q&A pairs found, generating them first...")
+        session.qa_pairs = await generate_current_qa_pairs(session)
+        print(f"✅ Generated {len(session.qa_pairs)} Q&A pairs")
+    else:
+        print(f"✅ Using existing {len(session.qa_pairs)} Q&A pairs")
+
+@app.post("/api/generate-slides", response_model=List[SlideContent])
+async def generate_slides_from_qa(session: DeckSession = Depends(get_session)):
+    """Generate slides based on Q&A pairs from the uploaded document (auto-generates Q&A if needed)"""
+    print(f"🔄 Generate slides request received (session {session.session_id})")
+    async with session.lock:
+        await wait_for_pending_upload(session)
+        check_slide_generation_ready(session)
         
-    except Exception as e:
-        error_msg = f"Failed to generate slides: {str(e)}"
-        print(f"❌ {error_msg}")
-        print(f"🔍 Error details: {type(e).__name__}: {e}")
-        raise HTTPException(status_code=500, detail=error_msg)
+        document_hash = session.document_hash
+        try:
+            # Reuse slides generated earlier for the same document content
+            deck = reuse_cached_deck(session, document_hash)
+            if deck:
+                return list(deck.slides)
+            
+            # Step 1: Generate Q&A pairs if they don't exist
+            await ensure_qa_pairs(session)
+            
+            # Step 2: Generate slides using Q&A pairs
+            print(f"🎯 Generating slides from {len(session.qa_pairs)} Q&A pairs...")
+            print(f"📄 Document: {session.document_summary.title}")
+            
+            slides = await generate_slides_from_qa_pairs_async(
+                client=async_openai_client,
+                qa_pairs=session.qa_pairs,
+                document_summary=session.document_summary
+            )
+            
+            print(f"✅ Generated {len(slides)} slides successfully")
+            
+            if session.document_hash != document_hash:
+                raise HTTPException(status_code=409, detail="A new document was uploaded while slides were being generated")
+            
+            # Publish the new deck to the session in one atomic swap
+            deck = SlideDeck.build(slides)
+            session.publish_deck(deck)
+            if document_hash:
+                document_cache.update(document_hash, qa_pairs=session.qa_pairs, deck=deck)
+            
+            live_updates.publish(live_update(f"{len(deck)} slides are ready for '{session.document_summary.title}'"))
+            
+            # Step 3: Start generating audio for all slides in the background
+            generate_audio_for_all_slides(session, deck)
+            
+            return slides
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            error_msg = f"Failed to generate slides: {str(e)}"
+            print(f"❌ {error_msg}")
+            print(f"🔍 Error details: {type(e).__name__}: {e}")
+            raise HTTPException(status_code=500, detail=error_msg)
+
+def ndjson_event(event: str, **fields) -> str:
+    """One line of the NDJSON slide stream"""
+    return json.dumps({"event": event, **jsonable_encoder(fields)}) + "\n"
+
+@app.post("/api/generate-slides/stream")
+async def stream_slides_from_qa(session: DeckSession = Depends(get_session)):
+    """Generate slides like /api/generate-slides, streaming each one as NDJSON as soon as it is complete
+    
+    Lines are {"event": "slide", "slide": {...}}, then {"event": "done", ...} or
+    {"event": "error", "detail": ...}. Each slide is published to the session and
+    queued for narration the moment it arrives.
+    """
+    print(f"🔄 Streaming slides request received (session {session.session_id})")
+    await wait_for_pending_upload(session)
+    check_slide_generation_ready(session)
+    
+    async def stream_slides() -> AsyncIterator[str]:
+        async with session.lock:
+            document_hash = session.document_hash
+            narrator = None
+            try:
+                deck = reuse_cached_deck(session, document_hash)
+                if deck:
+                    for slide in deck:
+                        yield ndjson_event("slide", slide=slide)
+                    yield ndjson_event("done", total_slides=len(deck), deck_version=deck.version, cached=True)
+                    return
+                
+                await ensure_qa_pairs(session)
+                print(f"🎯 Streaming slides from {len(session.qa_pairs)} Q&A pairs...")
+                
+                slides = []
+                async for slide in stream_slides_from_qa_pairs_async(
+                    client=async_openai_client,
+                    qa_pairs=session.qa_pairs,
+                    document_summary=session.document_summary
+                ):
+                    if session.document_hash != document_hash:
+                        yield ndjson_event("error", detail="A new document was uploaded while slides were being generated")
+                        return
+                    if narrator is None:
+                        narrator = create_slide_narrator(session)
+                    # Every slide publishes a new deck snapshot, so readers see the deck grow
+                    slides.append(slide)
+                    session.publish_deck(SlideDeck.build(slides), keep_narrator=True)
+                    if narrator:
+                        narrator.add(slide)
+                    print(f"📤 Streamed slide {slide.slide_number}: {slide.title}")
+                    yield ndjson_event("slide", slide=slide)
+                
+                # Only a complete deck is cached; a failed stream leaves the cache untouched
+                deck = session.deck
+                if document_hash:
+                    document_cache.update(document_hash, qa_pairs=session.qa_pairs, deck=deck)
+                live_updates.publish(live_update(f"{len(deck)} slides are ready for '{session.document_summary.title}'"))
+                yield ndjson_event("done", total_slides=len(deck), deck_version=deck.version, cached=False)
+            
+            except Exception as e:
+                print(f"❌ Failed to stream slides: {type(e).__name__}: {e}")
+                yield ndjson_event("error", detail=f"Failed to generate slides: {str(e)}")
+            finally:
+                # Also runs when the client disconnects, so on_complete still fires for the slides queued so far
+                if narrator:
+                    narrator.close()
+    
+    return StreamingResponse(stream_slides(), media_type="application/x-ndjson")
 
 # Helper function to parse AI summary into DocumentSummary structure
 def parse_ai_summary_to_document_summary(ai_summary: str, filename: str) -> DocumentSummary:
@@ -366,23 +659,17 @@ def parse_ai_summary_to_document_summary(ai_summary: str, filename: str) -> Docu
         )
 
 # PDF Processing Functions
-def extract_text_from_pdf(file_contents: bytes) -> tuple[str, int]:
-    """Extract text from PDF and return text + page count"""
+def extract_text_from_pdf(source: Union[str, bytes]) -> ExtractedPdf:
+    """Extract per-page text from PDF once for every stage of the upload pipeline"""
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_contents))
-        text = ""
-        page_count = len(pdf_reader.pages)
-        
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text, page_count
+        return extract_pdf_pages(source)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to extract PDF text: {str(e)}")
 
-def analyze_document_content(text: str, filename: str) -> dict:
+def analyze_document_content(extracted: ExtractedPdf, filename: str) -> dict:
     """Analyze extracted text and generate insights"""
     # Simple analysis - in production you'd use AI/ML here
+    text = extracted.text
     words = text.split()
     word_count = len(words)
     
@@ -436,81 +723,184 @@ def analyze_document_content(text: str, filename: str) -> dict:
         "estimated_slides": min(12, max(4, len(sections) * 2))
     }
 
+async def spool_upload_to_disk(file: UploadFile, destination: str, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[int, str]:
+    """Stream an upload to disk in chunks, enforcing the size limit as bytes arrive
+
+    Returns the file size in bytes and its content hash.
+    """
+    hasher = new_content_hasher()
+    size = 0
+    with open(destination, 'wb') as out:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File size must be less than {max_bytes // (1024 * 1024)}MB")
+            hasher.update(chunk)
+            out.write(chunk)
+    return size, hasher.hexdigest()
+
+async def run_upload_job(job: UploadJob, session: DeckSession, temp_dir: str, temp_pdf_path: str, extracted: ExtractedPdf, quick_result: UploadResult) -> None:
+    """Run the OpenAI stages of an upload in the background on the async client"""
+    async def index(results: dict):
+        if RETRIEVAL_BACKEND in LOCAL_RETRIEVAL_BACKENDS:
+            # Build the offline retrieval index from the shared extraction
+            retrieval_index = await asyncio.to_thread(build_retrieval_index, job.document_hash, extracted)
+            print(f"✅ Local retrieval index built: {len(retrieval_index)} chunks")
+            return None, retrieval_index
+        # Create a vector store and upload the PDF for Q&A functionality
+        return await index_in_vector_store(job, temp_pdf_path), None
+    
+    async def summarize(results: dict):
+        # Generate the AI summary from the shared extraction; also returns whether it is worth caching
+        try:
+            summary = await generate_summary_async(async_openai_client, temp_pdf_path, extracted, fallback=False)
+        except Exception as e:
+            print(f"⚠️ AI summary failed for {job.filename}, showing a placeholder: {e}")
+            return fallback_summary(job.filename), False
+        print(f"✅ AI summary generated for: {job.filename}")
+        return summary, True
+    
+    try:
+        # Indexing and summarizing are independent, so they run side by side
+        started = time.perf_counter()
+        results = await run_stages(job, [
+            Stage("indexing", index),
+            Stage("summarizing", summarize),
+        ])
+        job_vector_store_id, job_retrieval_index = results["indexing"]
+        summary, summary_generated = results["summarizing"]
+        timings = ", ".join(f"{name} {seconds}s" for name, seconds in job.timings.items())
+        print(f"⏱️ Upload stages for {job.filename}: {timings} (wall {time.perf_counter() - started:.2f}s)")
+        
+        # Only publish results if no newer document was uploaded meanwhile
+        if session.document_hash == job.document_hash:
+            session.document_summary = summary
+            session.vector_store_id = job_vector_store_id
+            session.retrieval_index = job_retrieval_index
+        
+        # Cache the AI artifacts so the next upload of these bytes is instant; a placeholder
+        # summary isn't cached, so the next upload retries it
+        if summary_generated and (job_vector_store_id or job_retrieval_index):
+            document_cache.put(CachedDocument(
+                document_hash=job.document_hash,
+                filename=job.filename,
+                vector_store_id=job_vector_store_id,
+                retrieval_index=job_retrieval_index,
+                summary=summary,
+                upload_result=quick_result.model_copy(update={"jobId": None, "jobStatus": None})
+            ))
+            if job_vector_store_id:
+                print(f"🗃️ Vector store ready for Q&A: {job_vector_store_id}")
+        
+        job.complete()
+        live_updates.publish(live_update(f"'{job.filename}' has been processed and is ready for slides"))
+        print(f"🎉 Upload job {job.job_id} completed for: {job.filename}")
+        
+    except Exception as e:
+        job.fail(str(e))
+        live_updates.publish(live_update(f"Processing '{job.filename}' failed"))
+        print(f"❌ Upload job {job.job_id} failed: {str(e)}")
+    finally:
+        # Clean up temporary file
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def build_retrieval_index(document_hash: str, extracted: ExtractedPdf):
+    """Build the offline index for the configured backend (embedding index for "dense", BM25 otherwise)"""
+    if RETRIEVAL_BACKEND == "dense":
+        return EmbeddingIndex.load_or_build(document_hash, extracted, create_embedder(openai_client))
+    return LocalRetrievalIndex.from_extracted(extracted)
+
+async def index_in_vector_store(job: UploadJob, temp_pdf_path: str) -> Optional[str]:
+    """Create a vector store for the job's document and upload the PDF to it"""
+    print(f"🔄 Creating vector store for: {job.filename}")
+    store_name = f"document_store_{job.filename.replace('.pdf', '')}_{int(time.time())}"
+    vector_store_details = await create_vector_store_async(async_openai_client, store_name)
+    
+    if not (vector_store_details and 'id' in vector_store_details):
+        print(f"⚠️ Failed to create vector store")
+        job.finish_stage("indexing", "failed")
+        return None
+    
+    job_vector_store_id = vector_store_details['id']
+    print(f"✅ Vector store created: {job_vector_store_id}")
+    
+    print(f"🔄 Uploading PDF to vector store...")
+    upload_result = await upload_single_pdf_async(async_openai_client, temp_pdf_path, job_vector_store_id)
+    
+    if upload_result['status'] == 'success':
+        print(f"✅ PDF uploaded to vector store successfully")
+    else:
+        print(f"⚠️ PDF upload to vector store failed: {upload_result.get('error', 'Unknown error')}")
+    return job_vector_store_id
+
+async def wait_for_pending_upload(session: DeckSession) -> None:
+    """Wait for the session's upload job, so requests made right after an upload see its results"""
+    job = session.upload_job
+    if job and job.document_hash == session.document_hash and not job.finished:
+        print(f"⏳ Waiting for upload job {job.job_id} ({job.stage})...")
+        await job.wait()
+
 # PDF Upload Endpoint
 @app.post("/api/upload", response_model=UploadResult)
-async def upload_pdf(file: UploadFile = File(...)):
-    """Process uploaded PDF and extract content for presentation generation"""
-    global current_document_summary, vector_store_id
-    
+async def upload_pdf(file: UploadFile = File(...), session: DeckSession = Depends(get_session)):
+    """Process uploaded PDF: return the local analysis right away and run AI stages as a background job"""
     # Validate file type
     if not file.content_type == "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Read file contents
-    file_contents = await file.read()
-    file_size_mb = len(file_contents) / (1024 * 1024)
-    
-    # Validate file size (10MB limit)
-    if file_size_mb > 10:
-        raise HTTPException(status_code=400, detail="File size must be less than 10MB")
-    
     start_time = time.time()
     
+    # Stream the upload to disk once; every later stage works from this file
+    temp_dir = tempfile.mkdtemp()
+    temp_pdf_path = os.path.join(temp_dir, os.path.basename(file.filename or "upload.pdf"))
+    job_started = False
+    
     try:
-        # Save PDF file locally
-        temp_dir = tempfile.mkdtemp()
-        temp_pdf_path = os.path.join(temp_dir, file.filename)
+        file_size, document_hash = await spool_upload_to_disk(file, temp_pdf_path)
+        file_size_mb = file_size / (1024 * 1024)
         
-        with open(temp_pdf_path, 'wb') as temp_file:
-            temp_file.write(file_contents)
+        # Serve re-uploads of identical PDFs straight from the document cache
+        cached_document = document_cache.get(document_hash)
+        if cached_document and cached_document.upload_result:
+            session.reset_document(document_hash)
+            session.upload_job = None
+            session.document_summary = cached_document.summary
+            session.vector_store_id = cached_document.vector_store_id
+            session.retrieval_index = cached_document.retrieval_index
+            session.qa_pairs = cached_document.qa_pairs
+            session.publish_deck(cached_document.deck)
+            processing_time = round(time.time() - start_time, 2)
+            print(f"⚡ Document cache hit for: {file.filename} ({document_hash[:12]})")
+            return cached_document.upload_result.model_copy(update={
+                "message": f"Loaded '{file.filename}' from document cache",
+                "filename": file.filename,
+                "processingTime": f"{processing_time} seconds",
+                "sessionId": session.session_id
+            })
         
-        # Create vector store and upload PDF for Q&A functionality
-        if openai_client:
-            print(f"🔄 Creating vector store for: {file.filename}")
-            
-            # Create a new vector store for this document
-            store_name = f"document_store_{file.filename.replace('.pdf', '')}_{int(time.time())}"
-            vector_store_details = create_vector_store(openai_client, store_name)
-            
-            if vector_store_details and 'id' in vector_store_details:
-                vector_store_id = vector_store_details['id']
-                print(f"✅ Vector store created: {vector_store_id}")
-                
-                # Upload PDF to vector store
-                print(f"🔄 Uploading PDF to vector store...")
-                upload_result = upload_single_pdf(openai_client, temp_pdf_path, vector_store_id)
-                
-                if upload_result['status'] == 'success':
-                    print(f"✅ PDF uploaded to vector store successfully")
-                else:
-                    print(f"⚠️ PDF upload to vector store failed: {upload_result.get('error', 'Unknown error')}")
-            else:
-                print(f"⚠️ Failed to create vector store")
-                vector_store_id = None
-            
-            # Generate AI summary
-            current_document_summary = generate_summary(openai_client, temp_pdf_path)
-            print(f"✅ AI summary generated for: {file.filename}")
-        else:
-            print(f"⚠️ OpenAI client not available, skipping vector store creation")
-            vector_store_id = None
+        # Switch to the new document; AI results are filled in by the upload job
+        session.reset_document(document_hash)
+        session.upload_job = None
+        
+        # Parse the PDF once; summary, analysis and preview all reuse this result
+        extract_started = time.perf_counter()
+        extracted = await asyncio.to_thread(extract_text_from_pdf, temp_pdf_path)
+        extract_seconds = time.perf_counter() - extract_started
         
         # Basic analysis for response
-        extracted_text, page_count = extract_text_from_pdf(file_contents)
-        analysis = analyze_document_content(extracted_text, file.filename)
+        analysis = analyze_document_content(extracted, file.filename)
         processing_time = round(time.time() - start_time, 2)
         
-        # Clean up temporary file
-        os.remove(temp_pdf_path)
-        os.rmdir(temp_dir)
-        
         # Return simple result
         result = UploadResult(
             success=True,
-            message=f"Successfully processed '{file.filename}' with AI analysis and vector store creation",
+            message=f"Extracted '{file.filename}'; AI analysis and vector store creation are running in the background",
             filename=file.filename,
             fileSize=f"{file_size_mb:.2f} MB",
-            pages=page_count,
+            pages=extracted.page_count,
             readingTime=analysis["reading_time"],
             topics=len(analysis["detected_topics"]),
             processingTime=f"{processing_time} seconds",
@@ -519,66 +909,95 @@ async def upload_pdf(file: UploadFile = File(...)):
             generatedSlides=analysis["estimated_slides"],
             detectedLanguage="English",
             complexity=analysis["complexity"],
-            extractedText=extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text
+            extractedText=extracted.preview(1000),
+            sessionId=session.session_id
         )
         
         print(f"📄 PDF Processed: {file.filename} ({file_size_mb:.2f}MB) in {processing_time}s")
-        if vector_store_id:
-            print(f"🗃️ Vector store ready for Q&A: {vector_store_id}")
+        
+        if not openai_client:
+            print(f"⚠️ OpenAI client not available, skipping vector store creation")
+            return result.model_copy(update={"message": f"Successfully processed '{file.filename}' (AI analysis unavailable)"})
+        
+        # Hand the AI stages to a background job; the temp file now belongs to the job
+        job = upload_jobs.create(file.filename, document_hash)
+        job.finish_stage("extracting", seconds=extract_seconds)
+        result = result.model_copy(update={"jobId": job.job_id, "jobStatus": job.status})
+        session.upload_job = job
+        job.task = asyncio.create_task(run_upload_job(job, session, temp_dir, temp_pdf_path, extracted, result))
+        job_started = True
+        print(f"🚀 Started upload job {job.job_id} for: {file.filename}")
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ PDF Processing Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e)}")
+    finally:
+        if not job_started:
+            # Clean up temporary file
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+@app.get("/api/upload/{job_id}/status", response_model=UploadJobStatus)
+async def get_upload_status(job_id: str):
+    """Get per-stage progress of a background upload job"""
+    job = upload_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Upload job {job_id} not found")
+    return job.to_status()
 
+@app.get("/api/slides/{slide_number}/voice")
 @app.post("/api/slides/{slide_number}/voice")
-async def generate_slide_narration(slide_number: int):
+async def generate_slide_narration(slide_number: int, request: Request, session: DeckSession = Depends(get_session)):
     """Get voice narration for a specific slide (uses pre-generated audio if available)"""
     try:
+        # Work on one deck snapshot throughout, even if a new deck is published meanwhile
+        deck = session.deck
+        
         # First, try to get cached audio
-        cached_audio = get_slide_audio(slide_number)
+        cached_audio = await get_slide_audio(deck, slide_number)
+        
+        # Slide still queued for background synthesis: move it to the front and wait on it
+        if not cached_audio and session.narrator and session.narrator.handles(slide_number):
+            print(f"⏳ Waiting for background audio of slide {slide_number}...")
+            if await session.narrator.wait_for(slide_number):
+                cached_audio = await get_slide_audio(deck, slide_number)
         
         if cached_audio:
             print(f"✅ Serving cached audio for slide {slide_number}")
-            audio_bytes = BytesIO(cached_audio)
-            return StreamingResponse(
-                audio_bytes,
-                media_type="audio/mpeg",
-                headers={"Content-Disposition": f"attachment; filename=slide_{slide_number}_narration.mp3"}
-            )
+            return audio_file_response(request, cached_audio, f"slide_{slide_number}_narration.mp3", slide_audio_key(deck, slide_number))
         
         # If no cached audio, generate on-demand
         print(f"🔄 No cached audio found for slide {slide_number}, generating on-demand...")
         
-        # Use the voice agent to get narration for the slide
-        from voice_agent import SimpleVoiceAgent
-        voice_agent = SimpleVoiceAgent(openai_client)
-        
-        # Get narration text for the specific slide
-        narration_text = voice_agent.get_slide_narration(slide_number)
+        # Precomputed narration text for the specific slide
+        narration_text = deck.narration(slide_number)
         
-        if narration_text == "Slide not found.":
+        if narration_text is None:
             raise HTTPException(status_code=404, detail="Slide not found")
         
+        from voice_agent import SimpleVoiceAgent
+        voice_agent = SimpleVoiceAgent(openai_client, session, async_openai_client)
+        
+        if TTS_STREAMING and "range" not in request.headers:
+            # Forward chunks as they are synthesized; the agent caches the complete audio
+            return StreamingResponse(
+                await prime_audio_stream(voice_agent.stream_audio(narration_text, SLIDE_NARRATION_VOICE)),
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": f"attachment; filename=slide_{slide_number}_narration.mp3"}
+            )
+        
         # Generate speech using the voice agent
-        audio_content = await voice_agent.generate_audio(narration_text)
+        audio_content = await voice_agent.generate_audio(narration_text, SLIDE_NARRATION_VOICE)
         
         if not audio_content:
             raise HTTPException(status_code=500, detail="Failed to generate audio content")
         
-        # Cache the generated audio for future use
-        slide_audio_cache[slide_number] = audio_content
         print(f"✅ Generated and cached audio for slide {slide_number}")
         
-        # Convert to streaming response
-        audio_bytes = BytesIO(audio_content)
-        
-        return StreamingResponse(
-            audio_bytes,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": f"attachment; filename=slide_{slide_number}_narration.mp3"}
-        )
+        return audio_file_response(request, audio_content, f"slide_{slide_number}_narration.mp3", slide_audio_key(deck, slide_number))
         
     except HTTPException:
         raise
@@ -586,7 +1005,7 @@ async def generate_slide_narration(slide_number: int):
         raise HTTPException(status_code=500, detail=f"Voice generation failed: {str(e)}")
 
 @app.post("/api/voice/custom")
-async def generate_custom_narration(request: dict):
+async def generate_custom_narration(request: dict, http_request: Request):
     """Generate voice narration for custom text"""
     try:
         text = request.get("text", "")
@@ -595,12 +1014,37 @@ async def generate_custom_narration(request: dict):
         if not text:
             raise HTTPException(status_code=400, detail="Text is required")
         
-        if len(text) > 4000:  # OpenAI TTS limit
-            raise HTTPException(status_code=400, detail="Text too long (max 4000 characters)")
-        
         # Use the voice agent for consistency
-        from voice_agent import SimpleVoiceAgent
-        voice_agent = SimpleVoiceAgent(openai_client)
+        from voice_agent import SimpleVoiceAgent, split_narration_text
+        voice_agent = SimpleVoiceAgent(openai_client, async_client=async_openai_client)
+        
+        # Text beyond one TTS request is narrated as sentence-aligned chunks, concatenated in order
+        chunks = split_narration_text(text)
+        if not chunks:
+            raise HTTPException(status_code=400, detail="Text has nothing to narrate")
+        if len(chunks) > 1:
+            print(f"🧩 Narrating {len(text)} characters as {len(chunks)} chunks")
+            return StreamingResponse(
+                await prime_audio_stream(voice_agent.stream_long_audio(chunks, voice)),
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": "attachment; filename=custom_narration.mp3"}
+            )
+        
+        # A single chunk is the text with its whitespace normalized, which is what gets narrated
+        text = chunks[0]
+        cache_key = audio_cache_key(text, voice)
+        
+        # Already synthesized narrations support conditional and range requests
+        cached_audio = await asyncio.to_thread(audio_cache.get, cache_key)
+        if cached_audio:
+            return audio_file_response(http_request, cached_audio, "custom_narration.mp3", cache_key)
+        
+        if TTS_STREAMING and "range" not in http_request.headers:
+            return StreamingResponse(
+                await prime_audio_stream(voice_agent.stream_audio(text, voice)),
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": "attachment; filename=custom_narration.mp3"}
+            )
         
         # Generate speech using the voice agent
         audio_content = await voice_agent.generate_audio(text, voice)
@@ -608,27 +1052,24 @@ async def generate_custom_narration(request: dict):
         if not audio_content:
             raise HTTPException(status_code=500, detail="Failed to generate audio content")
         
-        # Convert to streaming response
-        audio_bytes = BytesIO(audio_content)
-        
-        return StreamingResponse(
-            audio_bytes,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=custom_narration.mp3"}
-        )
+        return audio_file_response(http_request, audio_content, "custom_narration.mp3", cache_key)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice generation failed: {str(e)}")
 
 @app.get("/api/voice/status")
-async def get_voice_agent_status():
+async def get_voice_agent_status(session: DeckSession = Depends(get_session)):
     """Get current voice agent and slides status"""
     try:
         from voice_agent import SimpleVoiceAgent
-        voice_agent = SimpleVoiceAgent(openai_client)
+        voice_agent = SimpleVoiceAgent(openai_client, session)
         
         # Get comprehensive status
         slides_info = voice_agent.get_slides_info()
+        deck = session.deck
+        cached_slides = [number for number in deck.slide_numbers if slide_audio_key(deck, number) in audio_cache]
         
         return {
             "voice_agent_available": True,
@@ -640,8 +1081,12 @@ async def get_voice_agent_status():
             "slides_list": slides_info["slides"],
             "voice_options": ["alloy", "echo", "fable", "onyx", "nova", "shimmer"],
             "ready_for_narration": slides_info["slides_available"] and openai_client is not None,
-            "audio_cache_size": len(slide_audio_cache),
-            "cached_slides": list(slide_audio_cache.keys())
+            "audio_cache_size": len(cached_slides),
+            "cached_slides": cached_slides,
+            "deck_version": deck.version,
+            "audio_progress": session.narrator.status if session.narrator else {},
+            "session_id": session.session_id,
+            "narration_audio_cache": audio_cache.stats()
         }
         
     except Exception as e:
@@ -654,11 +1099,22 @@ async def get_voice_agent_status():
             "audio_cache_size": 0
         }
 
+@app.get("/api/stats")
+async def get_server_stats():
+    """Server-wide cache, session, live update, assistant pool and prompt budget statistics"""
+    return {
+        "sessions": session_store.stats(),
+        "document_cache": document_cache.stats(),
+        "live_updates": live_updates.stats(),
+        "assistant_pool": assistant_pool.stats(),
+        "prompt_budget": budget_stats.stats()
+    }
+
 @app.post("/api/voice/clear-cache")
-async def clear_voice_cache():
-    """Clear all cached slides and audio data"""
+async def clear_voice_cache(session: DeckSession = Depends(get_session)):
+    """Clear the session's cached slides and audio data"""
     try:
-        clear_slide_cache()
+        clear_slide_cache(session)
         return {
             "success": True,
             "message": "Successfully cleared slide and audio cache"
@@ -0,0 +1,104 @@
+# Background narration of a slide deck, in slide order with on-demand priority
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from data_models import SlideContent
+
+# Synthesizes one slide; returns True when its audio is cached
+SlideSynthesizer = Callable[[SlideContent], Awaitable[bool]]
+
+
+class DeckNarrator:
+    """Synthesizes a deck's audio in background workers, in the order slides are added
+
+    Slides can be added while the deck is still being generated; `close` marks
+    the deck complete, after which `on_complete` runs once every slide is
+    finished. `wait_for` moves a still-queued slide to the front of the queue
+    and waits on its synthesis, so a listener who skips ahead never triggers a
+    duplicate call. Must be used from the event loop thread.
+    """
+
+    def __init__(self, synthesize: SlideSynthesizer, concurrency: int = 4,
+                 on_complete: Optional[Callable[["DeckNarrator"], None]] = None):
+        self.synthesize = synthesize
+        self.concurrency = max(1, concurrency)
+        self.on_complete = on_complete
+        self.slides: Dict[int, SlideContent] = {}
+        self.queue: List[int] = []
+        self.results: Dict[int, asyncio.Future] = {}
+        self.status: Dict[int, str] = {}  # slide number -> "pending", "generating", "done" or "failed"
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+        self._completed = False
+
+    def add(self, slide: SlideContent) -> None:
+        """Queue a slide for synthesis, starting a worker if fewer than `concurrency` are running"""
+        number = slide.slide_number
+        if number in self.results or self._completed:
+            return
+        self.slides[number] = slide
+        self.queue.append(number)
+        self.results[number] = asyncio.get_running_loop().create_future()
+        self.status[number] = "pending"
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        if len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    def close(self) -> None:
+        """Mark the deck complete: no more slides will be added"""
+        self._closed = True
+        self._check_complete()
+
+    async def _work(self) -> None:
+        while self.queue:
+            number = self.queue.pop(0)
+            self.status[number] = "generating"
+            try:
+                ok = await self.synthesize(self.slides[number])
+            except Exception as e:
+                print(f"❌ Narration failed for slide {number}: {e}")
+                ok = False
+            self.status[number] = "done" if ok else "failed"
+            if not self.results[number].done():
+                self.results[number].set_result(ok)
+            self._check_complete()
+
+    def _check_complete(self) -> None:
+        if self._closed and not self._completed and self.finished:
+            self._completed = True
+            if self.on_complete:
+                self.on_complete(self)
+
+    def prioritize(self, slide_number: int) -> None:
+        """Move a queued slide to the front of the queue"""
+        if slide_number in self.queue:
+            self.queue.remove(slide_number)
+            self.queue.insert(0, slide_number)
+            print(f"⏫ Narration of slide {slide_number} moved to the front of the queue")
+
+    async def wait_for(self, slide_number: int) -> bool:
+        """Prioritize a slide and wait for its synthesis; False if it failed or is not in this deck"""
+        result = self.results.get(slide_number)
+        if result is None:
+            return False
+        self.prioritize(slide_number)
+        return await asyncio.shield(result)
+
+    def handles(self, slide_number: int) -> bool:
+        """Whether the slide is queued or being synthesized right now"""
+        result = self.results.get(slide_number)
+        return result is not None and not result.done()
+
+    @property
+    def finished(self) -> bool:
+        return all(result.done() for result in self.results.values())
+
+    def cancel(self) -> None:
+        """Stop synthesizing; waiters get False"""
+        self._completed = True
+        self.queue.clear()
+        for worker in self._workers:
+            worker.cancel()
+        for result in self.results.values():
+            if not result.done():
+                result.set_result(False)
@@ -1,17 +1,42 @@
 # Helper functions from https://github.com/openai/openai-cookbook/blob/5d9219a90890a681890b24e25df196875907b18c/examples/File_Search_Responses.ipynb#L10
 # Imports
 
-from openai import OpenAI
-import PyPDF2
-import io
+from openai import OpenAI, AsyncOpenAI
 import json
 import os
-from typing import List, Dict, Any, Optional, Union
+import re
+import asyncio
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 from tqdm import tqdm
 from data_models import SlideContent, LiveUpdate, DocumentSummary, UploadResult
+from pdf_extraction import ExtractedPdf, extract_pdf_pages
+from assistant_pool import AssistantPool, assistant_pool
+from run_polling import RunDeadlineExceeded, wait_for_run, wait_for_run_async, describe_run_failure
+from local_retrieval import LocalRetrievalIndex, LOCAL_RETRIEVAL_TOP_K
+from partial_json import JsonArrayItemStream
+from prompt_budget import fit_prompt
 
+# Default number of concurrent file-search answers per document
+QA_MAX_CONCURRENCY = 5
+
+# Answer all questions of a document in one file-search run (per-question runs fill any gaps)
+QA_BATCHED_FILE_SEARCH = os.getenv("QA_BATCHED_FILE_SEARCH", "false").lower() in ("1", "true", "yes")
+
+# Long-document summarization: longer documents are summarized section by section in parallel,
+# then the section notes are reduced into one summary (override with environment variables)
+SUMMARY_MAX_CHARS = 15000  # Approximately 3000-4000 tokens; the limit of a single summary call
+SUMMARY_LONG_DOCUMENTS = os.getenv("SUMMARY_LONG_DOCUMENTS", "true").lower() in ("1", "true", "yes")
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "8"))
+SUMMARY_CHUNK_MODEL = os.getenv("SUMMARY_CHUNK_MODEL", "gpt-4o-mini")
+SUMMARY_NOTE_WORDS = 200
+
+# Completion tokens kept free in the context window, per call type
+SUMMARY_COMPLETION_TOKENS = 1000
+QUESTIONS_COMPLETION_TOKENS = 500
+SLIDES_COMPLETION_TOKENS = 2000
 
 
 def upload_single_pdf(client, file_path: str, vector_store_id: str):
@@ -42,45 +67,184 @@ def create_vector_store(client, store_name: str) -> dict:
     except Exception as e:
         print(f"Error creating vector store: {e}")
         return {}
+
+
+async def upload_single_pdf_async(client: AsyncOpenAI, file_path: str, vector_store_id: str):
+    file_name = os.path.basename(file_path)
+    try:
+        with open(file_path, 'rb') as f:
+            file_response = await client.files.create(file=f, purpose="assistants")
+        await client.vector_stores.files.create(
+            vector_store_id=vector_store_id,
+            file_id=file_response.id
+        )
+        return {"file": file_name, "status": "success"}
+    except Exception as e:
+        print(f"Error with {file_name}: {str(e)}")
+        return {"file": file_name, "status": "failed", "error": str(e)}
+
+
+async def create_vector_store_async(client: AsyncOpenAI, store_name: str) -> dict:
+    try:
+        vector_store = await client.vector_stores.create(name=store_name)
+        details = {
+            "id": vector_store.id,
+            "name": vector_store.name,
+            "created_at": vector_store.created_at,
+            "file_count": vector_store.file_counts.completed
+        }
+        print("Vector store created:", details)
+        return details
+    except Exception as e:
+        print(f"Error creating vector store: {e}")
+        return {}
     
 
 def extract_text_from_pdf(pdf_path):
-    text = ""
     try:
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
+        return extract_pdf_pages(pdf_path).text
     except Exception as e:
         print(f"Error reading {pdf_path}: {e}")
-    return text
+        return ""
 
-def generate_summary(client, pdf_path):
-    text = extract_text_from_pdf(pdf_path)
-    filename = os.path.basename(pdf_path)
-    
+def _summary_text(pdf_path, extracted: Optional[ExtractedPdf] = None) -> str:
     # Truncate text if too long (OpenAI has token limits)
-    max_text_length = 15000  # Approximately 3000-4000 tokens
+    max_text_length = SUMMARY_MAX_CHARS
+    if extracted is not None:
+        return extracted.truncated(max_text_length)
+    text = extract_text_from_pdf(pdf_path)
     if len(text) > max_text_length:
         text = text[:max_text_length] + "..."
+    return text
 
-    prompt = (
-        f"Please analyze this document and generate a comprehensive summary. "
-        f"Extract structured information from the document.\n\n"
-        f"Document content:\n{text}\n\n"
-        f"Provide a structured summary with title, abstract, key points, main topics, "
-        f"difficulty level, estimated read time, document type, authors, and publication date."
-    )
+# A run of consecutive pages: (first page, last page, text)
+Section = Tuple[int, int, str]
+
+def _section_label(section: Section) -> str:
+    first, last, _ = section
+    return f"Page {first}" if first == last else f"Pages {first}-{last}"
+
+def _summary_sections(extracted: ExtractedPdf, chunk_chars: int) -> List[Section]:
+    """Group consecutive pages into sections of up to chunk_chars characters (longer pages are split)"""
+    sections: List[Section] = []
+    pieces: List[Tuple[int, str]] = []
+    length = 0
+    for page_number, page_text in enumerate(extracted.page_texts, 1):
+        for start in range(0, len(page_text), chunk_chars):
+            piece = page_text[start:start + chunk_chars]
+            if pieces and length + len(piece) > chunk_chars:
+                sections.append((pieces[0][0], pieces[-1][0], "\n".join(text for _, text in pieces)))
+                pieces, length = [], 0
+            pieces.append((page_number, piece))
+            length += len(piece)
+    if pieces:
+        sections.append((pieces[0][0], pieces[-1][0], "\n".join(text for _, text in pieces)))
+    return sections
+
+def _group_notes(notes: List[Section], chunk_chars: int) -> List[Section]:
+    """Merge consecutive section notes into sections of up to chunk_chars characters for another map pass"""
+    groups: List[Section] = []
+    for note in notes:
+        text = f"[{_section_label(note)}]\n{note[2]}"
+        if groups and len(groups[-1][2]) + len(text) <= chunk_chars:
+            first, _, joined = groups[-1]
+            groups[-1] = (first, note[1], f"{joined}\n\n{text}")
+        else:
+            groups.append((note[0], note[1], text))
+    return groups
 
+def _section_summary_request(section: Section) -> dict:
+    """Build the chat.completions arguments for the notes on one section of a long document"""
+    def build(texts: List[str]) -> dict:
+        return dict(
+            model=SUMMARY_CHUNK_MODEL,
+            messages=[
+                {"role": "system", "content": "You condense sections of long documents into dense notes for a later summary."},
+                {"role": "user", "content": (
+                    f"{_section_label(section)} of a longer document:\n\n{texts[0]}\n\n"
+                    f"Summarize this section in at most {SUMMARY_NOTE_WORDS} words: its main claims, methods, results "
+                    f"and key terms. If it names the document's title, authors or publication date, include them."
+                )}
+            ],
+            max_tokens=SUMMARY_NOTE_WORDS * 2
+        )
+    return fit_prompt("section summary", build, [section[2]])
+
+def _notes_text(extracted: ExtractedPdf, notes: List[Section]) -> str:
+    """Input of the reduce step: every section's notes, in document order"""
+    header = (f"Section-by-section notes on a {extracted.page_count}-page document "
+              f"of about {len(extracted.text.split())} words, in document order:")
+    return "\n\n".join([header] + [f"[{_section_label(note)}]\n{note[2]}" for note in notes])
+
+def _summarize_section(client, section: Section) -> Optional[Section]:
     try:
-        summary_schema = {
-            "name": "extract_summary",
-            "description": "Extract summary from input document.",
-            "parameters": DocumentSummary.model_json_schema()
-        }
-        response = client.chat.completions.create(
+        response = client.chat.completions.create(**_section_summary_request(section))
+        return (section[0], section[1], response.choices[0].message.content.strip())
+    except Exception as e:
+        print(f"⚠️ Could not summarize {_section_label(section)}: {e}")
+        return None
+
+async def _summarize_section_async(client: AsyncOpenAI, section: Section, semaphore: asyncio.Semaphore) -> Optional[Section]:
+    async with semaphore:
+        try:
+            response = await client.chat.completions.create(**_section_summary_request(section))
+            return (section[0], section[1], response.choices[0].message.content.strip())
+        except Exception as e:
+            print(f"⚠️ Could not summarize {_section_label(section)}: {e}")
+            return None
+
+def _long_summary_text(client, extracted: ExtractedPdf, chunk_chars: int = SUMMARY_CHUNK_CHARS,
+                       max_concurrency: int = SUMMARY_MAX_CONCURRENCY) -> str:
+    """Map step for long documents: summarize sections in parallel until the notes fit one summary call"""
+    sections = _summary_sections(extracted, chunk_chars)
+    print(f"📚 Summarizing {len(sections)} sections of {extracted.page_count} pages with {SUMMARY_CHUNK_MODEL}...")
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            notes = [note for note in executor.map(lambda section: _summarize_section(client, section), sections) if note]
+            if not notes:
+                return _summary_text(None, extracted)
+            text = _notes_text(extracted, notes)
+            sections = _group_notes(notes, chunk_chars)
+            if len(text) <= SUMMARY_MAX_CHARS or len(sections) == len(notes):
+                return text[:SUMMARY_MAX_CHARS]
+            print(f"📚 Condensing {len(notes)} section notes into {len(sections)}...")
+
+async def _long_summary_text_async(client: AsyncOpenAI, extracted: ExtractedPdf, chunk_chars: int = SUMMARY_CHUNK_CHARS,
+                                   max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+                                   semaphore: Optional[asyncio.Semaphore] = None) -> str:
+    """Async variant of _long_summary_text; a shared semaphore bounds section calls across documents"""
+    sections = _summary_sections(extracted, chunk_chars)
+    print(f"📚 Summarizing {len(sections)} sections of {extracted.page_count} pages with {SUMMARY_CHUNK_MODEL}...")
+    semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+    while True:
+        notes = [note for note in await asyncio.gather(*(
+            _summarize_section_async(client, section, semaphore) for section in sections
+        )) if note]
+        if not notes:
+            return _summary_text(None, extracted)
+        text = _notes_text(extracted, notes)
+        sections = _group_notes(notes, chunk_chars)
+        if len(text) <= SUMMARY_MAX_CHARS or len(sections) == len(notes):
+            return text[:SUMMARY_MAX_CHARS]
+        print(f"📚 Condensing {len(notes)} section notes into {len(sections)}...")
+
+def _summary_request(text: str) -> dict:
+    """Build the chat.completions arguments for a structured document summary"""
+    summary_schema = {
+        "name": "extract_summary",
+        "description": "Extract summary from input document.",
+        "parameters": DocumentSummary.model_json_schema()
+    }
+    
+    def build(texts: List[str]) -> dict:
+        prompt = (
+            f"Please analyze this document and generate a comprehensive summary. "
+            f"Extract structured information from the document.\n\n"
+            f"Document content:\n{texts[0]}\n\n"
+            f"Provide a structured summary with title, abstract, key points, main topics, "
+            f"difficulty level, estimated read time, document type, authors, and publication date."
+        )
+        return dict(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert document analyst. Provide structured, comprehensive summaries."},
@@ -89,43 +253,93 @@ def generate_summary(client, pdf_path):
             tools=[{"type": "function", "function": summary_schema}],
             tool_choice={"type": "function", "function": {"name": "extract_summary"}}
         )
+    return fit_prompt("summary", build, [text], SUMMARY_COMPLETION_TOKENS)
+
+def _parse_summary_response(response) -> DocumentSummary:
+    # Check if response and tool_calls exist
+    if response.choices and response.choices[0].message.tool_calls:
+        tool_call = response.choices[0].message.tool_calls[0]
+        structured_json = json.loads(tool_call.function.arguments)
+        return DocumentSummary(**structured_json)
+    print("No tool calls in response, falling back to basic summary")
+    raise Exception("No structured response from OpenAI")
+
+def fallback_summary(filename: str) -> DocumentSummary:
+    """Placeholder summary shown when the AI summary can't be generated; never worth caching"""
+    return DocumentSummary(
+        title=filename.replace('.pdf', ''),
+        abstract=f"Document analysis completed for {filename}. Full AI analysis unavailable.",
+        key_points=["Document uploaded successfully", "Text extraction completed", "Basic analysis performed"],
+        main_topics=["Document analysis", "Content processing"],
+        difficulty_level="intermediate",
+        estimated_read_time="30 minutes",
+        document_type="article",
+        authors=["Unknown"],
+        publication_date="2024-12-28"
+    )
+
+def generate_summary(client, pdf_path, extracted: Optional[ExtractedPdf] = None, long_document: bool = SUMMARY_LONG_DOCUMENTS):
+    """Generate a DocumentSummary, reusing an existing extraction of the PDF when given
+
+    With long_document, documents over SUMMARY_MAX_CHARS are summarized section by
+    section (map) and the notes reduced into one summary, instead of being truncated.
+    """
+    filename = os.path.basename(pdf_path)
 
-        # Check if response and tool_calls exist
-        if response.choices and response.choices[0].message.tool_calls:
-            tool_call = response.choices[0].message.tool_calls[0]
-            structured_json = json.loads(tool_call.function.arguments)
-            structured_output = DocumentSummary(**structured_json)
-            return structured_output
+    try:
+        if long_document and extracted is None:
+            extracted = extract_pdf_pages(pdf_path)
+        if long_document and len(extracted.text) > SUMMARY_MAX_CHARS:
+            text = _long_summary_text(client, extracted)
         else:
-            print("No tool calls in response, falling back to basic summary")
-            raise Exception("No structured response from OpenAI")
-    
+            text = _summary_text(pdf_path, extracted)
+        response = client.chat.completions.create(**_summary_request(text))
+        return _parse_summary_response(response)
     except Exception as e:
         print(f"Error generating summary: {e}")
-        # Return a basic DocumentSummary instead of string
-        return DocumentSummary(
-            title=filename.replace('.pdf', ''),
-            abstract=f"Document analysis completed for {filename}. Full AI analysis unavailable.",
-            key_points=["Document uploaded successfully", "Text extraction completed", "Basic analysis performed"],
-            main_topics=["Document analysis", "Content processing"],
-            difficulty_level="intermediate",
-            estimated_read_time="30 minutes",
-            document_type="article",
-            authors=["Unknown"],
-            publication_date="2024-12-28"
-        )
+        return fallback_summary(filename)
 
-def generate_questions_from_summary(client, summary: DocumentSummary) -> List[str]:
-    """Generate relevant questions based on the document summary"""
-    
-    prompt = f"""
+async def generate_summary_async(client: AsyncOpenAI, pdf_path, extracted: Optional[ExtractedPdf] = None,
+                                 long_document: bool = SUMMARY_LONG_DOCUMENTS,
+                                 semaphore: Optional[asyncio.Semaphore] = None,
+                                 fallback: bool = True) -> DocumentSummary:
+    """Async variant of generate_summary built on AsyncOpenAI
+
+    Every call it makes (section notes and the summary itself) takes a slot of
+    `semaphore`. Pass a shared one to bound in-flight requests across many documents.
+    With fallback=False, errors are raised instead of returning fallback_summary.
+    """
+    filename = os.path.basename(pdf_path)
+    if extracted is None:
+        extracted = await asyncio.to_thread(extract_pdf_pages, pdf_path)
+    semaphore = semaphore or asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+    try:
+        if long_document and len(extracted.text) > SUMMARY_MAX_CHARS:
+            text = await _long_summary_text_async(client, extracted, semaphore=semaphore)
+        else:
+            text = _summary_text(pdf_path, extracted)
+        async with semaphore:
+            response = await client.chat.completions.create(**_summary_request(text))
+        return _parse_summary_response(response)
+    except Exception as e:
+        if not fallback:
+            raise
+        print(f"Error generating summary: {e}")
+        return fallback_summary(filename)
+
+def _questions_request(summary: DocumentSummary) -> dict:
+    """Build the chat.completions arguments for generating questions from a summary"""
+    def build(texts: List[str]) -> dict:
+        abstract, key_points = texts
+        prompt = f"""
     Based on this document summary, generate 5-7 thoughtful questions that would help someone understand the key concepts and details of this paper. 
     Focus on questions that require specific information from the document to answer correctly.
     
     Document Summary:
     Title: {summary.title}
-    Abstract: {summary.abstract}
-    Key Points: {', '.join(summary.key_points)}
+    Abstract: {abstract}
+    Key Points: {key_points}
     Main Topics: {', '.join(summary.main_topics)}
     Document Type: {summary.document_type}
     Difficulty Level: {summary.difficulty_level}
@@ -139,9 +353,7 @@ def generate_questions_from_summary(client, summary: DocumentSummary) -> List[st
     
     Return only the questions, one per line.
     """
-
-    try:
-        response = client.chat.completions.create(
+        return dict(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert at generating insightful questions for academic papers. Create questions that require deep understanding of the document content."},
@@ -149,73 +361,88 @@ def generate_questions_from_summary(client, summary: DocumentSummary) -> List[st
             ],
             temperature=0.7
         )
+    # An oversized summary is condensed by trimming its abstract and key points
+    return fit_prompt("questions", build, [summary.abstract, ', '.join(summary.key_points)], QUESTIONS_COMPLETION_TOKENS)
 
-        questions_text = response.choices[0].message.content
-        questions = [q.strip() for q in questions_text.split('\n') if q.strip() and not q.strip().startswith('Question')]
-        
-        # Clean up numbered questions
-        cleaned_questions = []
-        for q in questions:
-            # Remove numbers like "1.", "2)", etc. from the beginning
-            import re
-            cleaned_q = re.sub(r'^\d+[\.)]\s*', '', q).strip()
-            if cleaned_q and cleaned_q.endswith('?'):
-                cleaned_questions.append(cleaned_q)
-        
-        return cleaned_questions[:7]  # Limit to 7 questions
+def _parse_questions_response(response) -> List[str]:
+    questions_text = response.choices[0].message.content
+    questions = [q.strip() for q in questions_text.split('\n') if q.strip() and not q.strip().startswith('Question')]
     
+    # Clean up numbered questions
+    cleaned_questions = []
+    for q in questions:
+        # Remove numbers like "1.", "2)", etc. from the beginning
+        cleaned_q = re.sub(r'^\d+[\.)]\s*', '', q).strip()
+        if cleaned_q and cleaned_q.endswith('?'):
+            cleaned_questions.append(cleaned_q)
+    
+    return cleaned_questions[:7]  # Limit to 7 questions
+
+def _fallback_questions(summary: DocumentSummary) -> List[str]:
+    return [
+        f"What is the main objective of {summary.title}?",
+        f"What methodology does this {summary.document_type} use?",
+        "What are the key findings or contributions?",
+        "What are the limitations mentioned in this work?",
+        "How does this work compare to previous research?"
+    ]
+
+def generate_questions_from_summary(client, summary: DocumentSummary) -> List[str]:
+    """Generate relevant questions based on the document summary"""
+    try:
+        response = client.chat.completions.create(**_questions_request(summary))
+        return _parse_questions_response(response)
     except Exception as e:
         print(f"Error generating questions: {e}")
-        return [
-            f"What is the main objective of {summary.title}?",
-            f"What methodology does this {summary.document_type} use?",
-            "What are the key findings or contributions?",
-            "What are the limitations mentioned in this work?",
-            "How does this work compare to previous research?"
-        ]
-
-def get_answer_using_file_search(client, question: str, vector_store_id: str, max_results: int = 5) -> str:
-    """Get answer to a question using file search via Assistants API"""
+        return _fallback_questions(summary)
+
+async def generate_questions_from_summary_async(client: AsyncOpenAI, summary: DocumentSummary) -> List[str]:
+    """Async variant of generate_questions_from_summary"""
+    try:
+        response = await client.chat.completions.create(**_questions_request(summary))
+        return _parse_questions_response(response)
+    except Exception as e:
+        print(f"Error generating questions: {e}")
+        return _fallback_questions(summary)
+
+def _message_text(messages) -> Optional[str]:
+    """Return the text of the newest message in a messages.list page"""
+    if messages.data:
+        message = messages.data[0]
+        if message.content and len(message.content) > 0:
+            content = message.content[0]
+            if hasattr(content, 'text') and hasattr(content.text, 'value'):
+                return content.text.value
+    return None
+
+def _file_search(client, content: str, vector_store_id: str, pool: AssistantPool, additional_instructions: Optional[str] = None):
+    """Run one file-search message on the pooled assistant; return (answer text or None, final run)"""
+    # Reuse the pooled file-search assistant for this vector store
+    assistant_id = pool.acquire(client, vector_store_id)
+    
+    # Create a thread
+    thread = client.beta.threads.create()
     
     try:
-        # Create a temporary assistant with file search capability
-        assistant = client.beta.assistants.create(
-            name="Document Q&A Assistant",
-            instructions="You are a helpful assistant that answers questions based on the provided documents. Provide clear, accurate answers based on the document content.",
-            model="gpt-4o-mini",
-            tools=[{"type": "file_search"}],
-            tool_resources={
-                "file_search": {
-                    "vector_store_ids": [vector_store_id]
-                }
-            }
-        )
-        
-        # Create a thread
-        thread = client.beta.threads.create()
-        
         # Add the question as a message
         client.beta.threads.messages.create(
             thread_id=thread.id,
             role="user",
-            content=question
+            content=content
         )
         
         # Run the assistant
+        run_args = {"additional_instructions": additional_instructions} if additional_instructions else {}
         run = client.beta.threads.runs.create(
             thread_id=thread.id,
-            assistant_id=assistant.id
+            assistant_id=assistant_id,
+            **run_args
         )
         
-        # Wait for completion
-        import time
-        while run.status in ['queued', 'in_progress']:
-            time.sleep(1)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread.id,
-                run_id=run.id
-            )
+        # Wait for completion with adaptive polling and a deadline
+        run = wait_for_run(client, thread.id, run)
         
+        answer = None
         if run.status == 'completed':
             # Get the assistant's response
             messages = client.beta.threads.messages.list(
@@ -223,35 +450,120 @@ def get_answer_using_file_search(client, question: str, vector_store_id: str, ma
                 order="desc",
                 limit=1
             )
-            
-            if messages.data:
-                message = messages.data[0]
-                if message.content and len(message.content) > 0:
-                    content = message.content[0]
-                    if hasattr(content, 'text') and hasattr(content.text, 'value'):
-                        answer = content.text.value
-                        
-                        # Clean up - delete the assistant and thread
-                        try:
-                            client.beta.assistants.delete(assistant.id)
-                        except:
-                            pass  # Ignore cleanup errors
-                        
-                        return answer
+            answer = _message_text(messages)
+        return answer, run
+    finally:
+        # Threads are deleted in batches by the pool
+        pool.release_thread(client, thread.id)
+
+async def _file_search_async(client: AsyncOpenAI, content: str, vector_store_id: str, pool: AssistantPool, additional_instructions: Optional[str] = None):
+    """Async variant of _file_search"""
+    assistant_id = await pool.acquire_async(client, vector_store_id)
+    thread = await client.beta.threads.create()
+    
+    try:
+        await client.beta.threads.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=content
+        )
+        run_args = {"additional_instructions": additional_instructions} if additional_instructions else {}
+        run = await client.beta.threads.runs.create(
+            thread_id=thread.id,
+            assistant_id=assistant_id,
+            **run_args
+        )
         
-        # Clean up on failure
-        try:
-            client.beta.assistants.delete(assistant.id)
-        except:
-            pass
+        # Wait for completion without blocking the event loop
+        run = await wait_for_run_async(client, thread.id, run)
         
-        return f"I found information related to your question in the document, but couldn't extract specific details. The assistant run status was: {run.status}"
-    
+        answer = None
+        if run.status == 'completed':
+            messages = await client.beta.threads.messages.list(
+                thread_id=thread.id,
+                order="desc",
+                limit=1
+            )
+            answer = _message_text(messages)
+        return answer, run
+    finally:
+        await pool.release_thread_async(client, thread.id)
+
+def get_answer_using_file_search(client, question: str, vector_store_id: str, max_results: int = 5, pool: AssistantPool = assistant_pool) -> str:
+    """Get answer to a question using file search via Assistants API"""
+    try:
+        answer, run = _file_search(client, question, vector_store_id, pool)
+        return answer or describe_run_failure(run)
+    except RunDeadlineExceeded as e:
+        print(f"⏱️ {e}")
+        return "The assistant did not answer in time."
     except Exception as e:
         print(f"Error getting answer for question '{question}': {e}")
         return "Unable to retrieve answer due to an error."
 
-def generate_qa_pairs_from_document(client, summary: DocumentSummary, vector_store_id: str) -> List[dict]:
+async def get_answer_using_file_search_async(client: AsyncOpenAI, question: str, vector_store_id: str, max_results: int = 5, pool: AssistantPool = assistant_pool) -> str:
+    """Async variant of get_answer_using_file_search"""
+    try:
+        answer, run = await _file_search_async(client, question, vector_store_id, pool)
+        return answer or describe_run_failure(run)
+    except RunDeadlineExceeded as e:
+        print(f"⏱️ {e}")
+        return "The assistant did not answer in time."
+    except Exception as e:
+        print(f"Error getting answer for question '{question}': {e}")
+        return "Unable to retrieve answer due to an error."
+
+BATCHED_ANSWER_INSTRUCTIONS = (
+    "Answer every numbered question using the attached documents. "
+    "Respond with only a JSON object of the form "
+    '{"answers": [{"question_number": 1, "answer": "..."}]}, '
+    "one entry per question, keeping each question_number as given. "
+    "Use an empty answer if the documents do not cover a question."
+)
+
+def _batched_questions_content(questions: List[str]) -> str:
+    return "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+
+def _parse_batched_answers(text: Optional[str], question_count: int) -> Dict[int, str]:
+    """Map question_number -> answer from a batched JSON reply, ignoring malformed entries"""
+    if not text:
+        return {}
+    # Tolerate code fences or citation text around the JSON object
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    answers = {}
+    for item in data.get("answers", []) if isinstance(data, dict) else []:
+        if not isinstance(item, dict):
+            continue
+        number, answer = item.get("question_number"), item.get("answer")
+        if isinstance(number, int) and 1 <= number <= question_count and isinstance(answer, str) and answer.strip():
+            answers[number] = answer.strip()
+    return answers
+
+def get_answers_batched_using_file_search(client, questions: List[str], vector_store_id: str, pool: AssistantPool = assistant_pool) -> Dict[int, str]:
+    """Answer all questions in one file-search run; returns answers keyed by question_number"""
+    try:
+        text, _ = _file_search(client, _batched_questions_content(questions), vector_store_id, pool, BATCHED_ANSWER_INSTRUCTIONS)
+        return _parse_batched_answers(text, len(questions))
+    except Exception as e:
+        print(f"Error getting batched answers: {e}")
+        return {}
+
+async def get_answers_batched_using_file_search_async(client: AsyncOpenAI, questions: List[str], vector_store_id: str, pool: AssistantPool = assistant_pool) -> Dict[int, str]:
+    """Async variant of get_answers_batched_using_file_search"""
+    try:
+        text, _ = await _file_search_async(client, _batched_questions_content(questions), vector_store_id, pool, BATCHED_ANSWER_INSTRUCTIONS)
+        return _parse_batched_answers(text, len(questions))
+    except Exception as e:
+        print(f"Error getting batched answers: {e}")
+        return {}
+
+def generate_qa_pairs_from_document(client, summary: DocumentSummary, vector_store_id: str, batched: bool = QA_BATCHED_FILE_SEARCH) -> List[dict]:
     """Generate question-answer pairs using summary for questions and file search for answers"""
     
     if not vector_store_id:
@@ -265,12 +577,17 @@ def generate_qa_pairs_from_document(client, summary: DocumentSummary, vector_sto
         print("No questions generated")
         return []
     
+    # Step 2 (batched mode): answer every question in a single file-search run
+    answers = get_answers_batched_using_file_search(client, questions, vector_store_id) if batched else {}
+    if batched:
+        print(f"Batched file search answered {len(answers)}/{len(questions)} questions")
+    
     print(f"Generated {len(questions)} questions, processing answers in parallel...")
     
-    # Step 2: Process questions in parallel using ThreadPoolExecutor
+    # Step 3: Process remaining questions in parallel using ThreadPoolExecutor
     def process_question(question_data):
         question, question_number = question_data
-        answer = get_answer_using_file_search(client, question, vector_store_id)
+        answer = answers.get(question_number) or get_answer_using_file_search(client, question, vector_store_id)
         return {
             "question": question,
             "answer": answer,
@@ -281,7 +598,7 @@ def generate_qa_pairs_from_document(client, summary: DocumentSummary, vector_sto
     question_data = [(question, i + 1) for i, question in enumerate(questions)]
     
     # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=5) as executor:  # Limit to 5 concurrent requests
+    with ThreadPoolExecutor(max_workers=QA_MAX_CONCURRENCY) as executor:  # Limit concurrent requests
         qa_pairs = list(tqdm(
             executor.map(process_question, question_data), 
             total=len(questions),
@@ -290,18 +607,187 @@ def generate_qa_pairs_from_document(client, summary: DocumentSummary, vector_sto
     
     return qa_pairs
 
+async def generate_qa_pairs_from_document_async(
+    client: AsyncOpenAI,
+    summary: DocumentSummary,
+    vector_store_id: str,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    batched: bool = QA_BATCHED_FILE_SEARCH
+) -> List[dict]:
+    """Async variant of generate_qa_pairs_from_document
 
-def generate_slides_from_qa_pairs(client, qa_pairs: List[dict], document_summary: DocumentSummary) -> List[SlideContent]:
-    """Generate slides from Q&A pairs to create an educational presentation"""
+    Answers are fetched concurrently with asyncio.gather. Pass a shared semaphore
+    to bound in-flight file searches across many documents on one event loop.
+    """
     
-    if not qa_pairs:
-        print("No Q&A pairs provided, cannot generate slides")
+    if not vector_store_id:
+        print("No vector store ID provided, cannot generate Q&A pairs")
         return []
     
-    # Prepare Q&A content for slide generation
-    qa_content = "\n\n".join([f"Q: {qa['question']}\nA: {qa['answer']}" for qa in qa_pairs])
+    semaphore = semaphore or asyncio.Semaphore(QA_MAX_CONCURRENCY)
+    async with semaphore:
+        questions = await generate_questions_from_summary_async(client, summary)
     
-    prompt = f"""
+    if not questions:
+        print("No questions generated")
+        return []
+    
+    answers = {}
+    if batched:
+        async with semaphore:
+            answers = await get_answers_batched_using_file_search_async(client, questions, vector_store_id)
+        print(f"Batched file search answered {len(answers)}/{len(questions)} questions")
+    
+    print(f"Generated {len(questions)} questions, processing answers concurrently...")
+    
+    async def process_question(question: str, question_number: int) -> dict:
+        answer = answers.get(question_number)
+        if not answer:
+            async with semaphore:
+                answer = await get_answer_using_file_search_async(client, question, vector_store_id)
+        return {
+            "question": question,
+            "answer": answer,
+            "question_number": question_number
+        }
+    
+    return list(await asyncio.gather(*(
+        process_question(question, i + 1) for i, question in enumerate(questions)
+    )))
+
+def _local_answer_request(question: str, context: str) -> dict:
+    """Build the chat.completions arguments for answering from locally retrieved context"""
+    def build(texts: List[str]) -> dict:
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that answers questions based on the provided document excerpts. Provide clear, accurate answers based on the excerpts only."},
+                {"role": "user", "content": f"Document excerpts:\n{texts[0]}\n\nQuestion: {question}"}
+            ]
+        )
+    return fit_prompt("local answer", build, [context])
+
+def _format_context(results) -> str:
+    return "\n\n".join(f"[Page {chunk.page}] {chunk.text}" for chunk, _ in results)
+
+def _extractive_answer(results) -> str:
+    """Answer with the best matching passages verbatim (no model call)"""
+    if not results:
+        return "No relevant passage was found in the document."
+    return "\n\n".join(f"(Page {chunk.page}) {chunk.text}" for chunk, _ in results[:2])  # Keep extractive answers slide-sized
+
+def _answer_from_results(client, question: str, results, extractive: bool) -> str:
+    if extractive or client is None:
+        return _extractive_answer(results)
+    try:
+        response = client.chat.completions.create(**_local_answer_request(question, _format_context(results)))
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Error getting answer for question '{question}': {e}")
+        return _extractive_answer(results)
+
+async def _answer_from_results_async(client: Optional[AsyncOpenAI], question: str, results, extractive: bool) -> str:
+    if extractive or client is None:
+        return _extractive_answer(results)
+    try:
+        response = await client.chat.completions.create(**_local_answer_request(question, _format_context(results)))
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Error getting answer for question '{question}': {e}")
+        return _extractive_answer(results)
+
+def get_answer_using_local_index(client, question: str, index: LocalRetrievalIndex, top_k: int = LOCAL_RETRIEVAL_TOP_K, extractive: bool = False) -> str:
+    """Answer a question from locally retrieved chunks: one chat call, or none in extractive mode
+
+    `index` is a LocalRetrievalIndex or any index with the same search interface
+    (such as embedding_index.EmbeddingIndex).
+    """
+    return _answer_from_results(client, question, index.search(question, top_k), extractive)
+
+async def get_answer_using_local_index_async(client: Optional[AsyncOpenAI], question: str, index: LocalRetrievalIndex, top_k: int = LOCAL_RETRIEVAL_TOP_K, extractive: bool = False) -> str:
+    """Async variant of get_answer_using_local_index"""
+    return await _answer_from_results_async(client, question, index.search(question, top_k), extractive)
+
+def generate_qa_pairs_from_local_index(client, summary: DocumentSummary, index: LocalRetrievalIndex, extractive: bool = False) -> List[dict]:
+    """Generate question-answer pairs with an offline retrieval index instead of a vector store
+
+    Retrieval for all questions runs as one batch. Without a client, questions
+    come from the summary template and answers are extractive.
+    """
+    questions = generate_questions_from_summary(client, summary) if client else _fallback_questions(summary)
+    results_per_question = index.search_batch(questions, LOCAL_RETRIEVAL_TOP_K)
+    return [
+        {
+            "question": question,
+            "answer": _answer_from_results(client, question, results, extractive),
+            "question_number": i + 1
+        }
+        for i, (question, results) in enumerate(zip(questions, results_per_question))
+    ]
+
+async def generate_qa_pairs_from_local_index_async(
+    client: Optional[AsyncOpenAI],
+    summary: DocumentSummary,
+    index: LocalRetrievalIndex,
+    extractive: bool = False,
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> List[dict]:
+    """Async variant of generate_qa_pairs_from_local_index"""
+    semaphore = semaphore or asyncio.Semaphore(QA_MAX_CONCURRENCY)
+    if client:
+        async with semaphore:
+            questions = await generate_questions_from_summary_async(client, summary)
+    else:
+        questions = _fallback_questions(summary)
+    # Dense search may embed the queries through the sync client and reads the mapped matrix from disk
+    results_per_question = await asyncio.to_thread(index.search_batch, questions, LOCAL_RETRIEVAL_TOP_K)
+    
+    async def process_question(question: str, results, question_number: int) -> dict:
+        async with semaphore:
+            answer = await _answer_from_results_async(client, question, results, extractive)
+        return {
+            "question": question,
+            "answer": answer,
+            "question_number": question_number
+        }
+    
+    return list(await asyncio.gather(*(
+        process_question(question, results, i + 1)
+        for i, (question, results) in enumerate(zip(questions, results_per_question))
+    )))
+
+SLIDES_SCHEMA = {
+    "name": "generate_slides_from_qa",
+    "description": "Generate educational slides from Q&A pairs",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "slides": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "content": {"type": "string"},
+                        "image_description": {"type": "string"},
+                        "speaker_notes": {"type": "string"},
+                        "slide_number": {"type": "integer"}
+                    },
+                    "required": ["title", "content", "image_description", "speaker_notes", "slide_number"]
+                }
+            }
+        },
+        "required": ["slides"]
+    }
+}
+
+def _slides_request(qa_pairs: List[dict], document_summary: DocumentSummary) -> dict:
+    """Build the chat.completions arguments for generating slides from Q&A pairs"""
+    def build(answers: List[str]) -> dict:
+        # Prepare Q&A content for slide generation
+        qa_content = "\n\n".join([f"Q: {qa['question']}\nA: {answer}" for qa, answer in zip(qa_pairs, answers)])
+        
+        prompt = f"""
     Create an engaging and practical presentation from this Q&A content. Focus on making slides that are easy to present and understand.
 
     **Document Context:**
@@ -322,74 +808,118 @@ def generate_slides_from_qa_pairs(client, qa_pairs: List[dict], document_summary
 
     Keep it simple and practical - focus on the key insights from the Q&A that would help someone understand the main concepts.
     """
-
-    slides_schema = {
-        "name": "generate_slides_from_qa",
-        "description": "Generate educational slides from Q&A pairs",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "slides": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string"},
-                            "content": {"type": "string"},
-                            "image_description": {"type": "string"},
-                            "speaker_notes": {"type": "string"},
-                            "slide_number": {"type": "integer"}
-                        },
-                        "required": ["title", "content", "image_description", "speaker_notes", "slide_number"]
-                    }
-                }
-            },
-            "required": ["slides"]
-        }
-    }
-
-    try:
-        response = client.chat.completions.create(
+        return dict(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert educator who creates clear, engaging slides from Q&A content. Generate valid JSON with proper escaping."},
                 {"role": "user", "content": prompt}
             ],
-            tools=[{"type": "function", "function": slides_schema}],
+            tools=[{"type": "function", "function": SLIDES_SCHEMA}],
             tool_choice={"type": "function", "function": {"name": "generate_slides_from_qa"}}
         )
+    # Long answers are truncated, longest first, so the prompt never overflows the context window
+    return fit_prompt("slides", build, [str(qa['answer']) for qa in qa_pairs], SLIDES_COMPLETION_TOKENS)
 
+def slide_from_data(slide_data: dict, default_number: int) -> SlideContent:
+    """Convert one slide object from the tool-call arguments to a SlideContent"""
+    return SlideContent(
+        title=slide_data.get("title", f"Slide {default_number}"),
+        content=slide_data.get("content", ""),
+        image_description=slide_data.get("image_description", ""),
+        speaker_notes=slide_data.get("speaker_notes", ""),
+        slide_number=slide_data.get("slide_number", default_number)
+    )
+
+def _parse_slides_response(response, document_summary: DocumentSummary) -> List[SlideContent]:
+    try:
         if not (response.choices and response.choices[0].message.tool_calls):
             raise Exception("No tool calls found in response")
         
         # Simple JSON parsing - let Python handle the escaping
         tool_call = response.choices[0].message.tool_calls[0]
-        slides_data = json.loads(tool_call.function.arguments)
+        try:
+            slides_data = json.loads(tool_call.function.arguments)
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON parsing error: {e}")
+            print(f"🔍 Raw response: {tool_call.function.arguments[:500]}...")
+            return create_fallback_slides(document_summary)
         print(slides_data)
         
         # Convert to SlideContent objects
-        slides = []
-        for i, slide_data in enumerate(slides_data["slides"], 1):
-            slide = SlideContent(
-                title=slide_data.get("title", f"Slide {i}"),
-                content=slide_data.get("content", ""),
-                image_description=slide_data.get("image_description", ""),
-                speaker_notes=slide_data.get("speaker_notes", ""),
-                slide_number=slide_data.get("slide_number", i)
-            )
-            slides.append(slide)
+        slides = [slide_from_data(slide_data, i) for i, slide_data in enumerate(slides_data["slides"], 1)]
         
         print(f"✅ Successfully generated {len(slides)} slides")
         return slides
         
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parsing error: {e}")
-        print(f"🔍 Raw response: {tool_call.function.arguments[:500]}...")
+    except Exception as e:
+        print(f"❌ Error generating slides: {e}")
         return create_fallback_slides(document_summary)
-        
+
+def generate_slides_from_qa_pairs(client, qa_pairs: List[dict], document_summary: DocumentSummary) -> List[SlideContent]:
+    """Generate slides from Q&A pairs to create an educational presentation"""
+    
+    if not qa_pairs:
+        print("No Q&A pairs provided, cannot generate slides")
+        return []
+    
+    try:
+        response = client.chat.completions.create(**_slides_request(qa_pairs, document_summary))
+    except Exception as e:
+        print(f"❌ Error generating slides: {e}")
+        return create_fallback_slides(document_summary)
+    return _parse_slides_response(response, document_summary)
+
+async def generate_slides_from_qa_pairs_async(client: AsyncOpenAI, qa_pairs: List[dict], document_summary: DocumentSummary) -> List[SlideContent]:
+    """Async variant of generate_slides_from_qa_pairs"""
+    
+    if not qa_pairs:
+        print("No Q&A pairs provided, cannot generate slides")
+        return []
+    
+    try:
+        response = await client.chat.completions.create(**_slides_request(qa_pairs, document_summary))
     except Exception as e:
         print(f"❌ Error generating slides: {e}")
         return create_fallback_slides(document_summary)
+    return _parse_slides_response(response, document_summary)
+
+async def stream_slides_from_qa_pairs_async(client: AsyncOpenAI, qa_pairs: List[dict], document_summary: DocumentSummary) -> AsyncIterator[SlideContent]:
+    """Streaming variant of generate_slides_from_qa_pairs_async: yield each slide as soon as its JSON object is complete
+
+    Falls back to create_fallback_slides only if the stream fails before the first
+    slide; a failure after that is raised, since the slides yielded so far are a partial deck.
+    """
+    
+    if not qa_pairs:
+        print("No Q&A pairs provided, cannot generate slides")
+        return
+    
+    parser = JsonArrayItemStream("slides")
+    count = 0
+    try:
+        stream = await client.chat.completions.create(**_slides_request(qa_pairs, document_summary), stream=True)
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                continue
+            for tool_call in chunk.choices[0].delta.tool_calls:
+                if not (tool_call.function and tool_call.function.arguments):
+                    continue
+                for slide_data in parser.feed(tool_call.function.arguments):
+                    count += 1
+                    yield slide_from_data(slide_data, count)
+    except Exception as e:
+        print(f"❌ Error streaming slides: {e}")
+        if count:
+            # Slides were already handed out; a fallback deck can't replace them, so the caller must know
+            raise
+    
+    if count and not parser.done:
+        raise RuntimeError(f"Slide stream ended after {count} slides, before the deck was complete")
+    if count:
+        print(f"✅ Successfully streamed {count} slides")
+    else:
+        for slide in create_fallback_slides(document_summary):
+            yield slide
 
 def create_fallback_slides(document_summary: DocumentSummary) -> List[SlideContent]:
     """Create simple fallback slides when generation fails"""
@@ -0,0 +1,64 @@
+# Incremental extraction of array elements from streamed JSON text
+import json
+from typing import List
+
+
+class JsonArrayItemStream:
+    """Yields each object of a top-level array field as soon as its closing brace arrives
+
+    Feed it fragments of a JSON document such as `{"slides": [{...}, {...}]}`
+    (e.g. streamed tool-call arguments); `feed` returns the objects of the
+    `key` array completed by that fragment. Strings and escapes are tracked,
+    so braces inside text never confuse the parser, and each character is
+    scanned only once.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._array_depth = None  # Depth inside the target array while parsing it
+        self._item_start = None
+        self.done = False  # The target array has closed
+
+    def feed(self, fragment: str) -> List[dict]:
+        self.text += fragment
+        items = []
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:self._pos]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos + 1
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._array_depth is None and not self.done and self._depth == 2 and self._last_string == self.key:
+                    self._array_depth = self._depth
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = self._pos
+            elif ch in "}]":
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        items.append(json.loads(text[self._item_start:self._pos + 1]))
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️ Skipping malformed streamed item: {e}")
+                    self._item_start = None
+                elif ch == "]" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self.done = True
+                self._depth -= 1
+            self._pos += 1
+        return items
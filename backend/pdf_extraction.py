@@ -0,0 +1,137 @@
+# Single-pass PDF text extraction shared by the upload pipeline
+import io
+import multiprocessing
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import PyPDF2
+
+# Parallel extraction settings (override with environment variables)
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "0")) or (os.cpu_count() or 1)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ExtractedPdf:
+    """Per-page text of a PDF, extracted once and reused by every pipeline stage"""
+    page_texts: List[str]
+    page_offsets: List[int]  # Character offset of each page within `text`
+    text: str
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_texts)
+
+    def page_for_offset(self, offset: int) -> int:
+        """Return the 1-based page number containing a character offset of `text`"""
+        return max(1, bisect_right(self.page_offsets, offset))
+
+    def preview(self, max_chars: int = 1000) -> str:
+        """Return the leading text used for quick-look previews"""
+        return self.truncated(max_chars)
+
+    def truncated(self, max_chars: int) -> str:
+        """Return the text cut to max_chars, marking the cut with an ellipsis"""
+        return self.text[:max_chars] + "..." if len(self.text) > max_chars else self.text
+
+
+def assemble_pages(page_texts: List[str]) -> ExtractedPdf:
+    """Join page texts (one newline after each page) and record page offsets"""
+    offsets = []
+    position = 0
+    for page_text in page_texts:
+        offsets.append(position)
+        position += len(page_text) + 1
+    text = "".join(f"{page_text}\n" for page_text in page_texts)
+    return ExtractedPdf(page_texts=page_texts, page_offsets=offsets, text=text)
+
+
+def get_extraction_pool(max_workers: int = PDF_EXTRACTION_WORKERS) -> ProcessPoolExecutor:
+    """Return the shared process pool, created on first use so startup is paid once per process
+
+    The pool may be created from a worker thread of the (multi-threaded) server, so
+    workers start from a forkserver (or are spawned) instead of forking that process.
+    A lock keeps concurrent first uses from each creating (and leaking) a pool.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _extraction_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+        return _extraction_pool
+
+
+def split_page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous (start, stop) ranges"""
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+@contextmanager
+def _open_stream(source: Union[str, bytes, BinaryIO]) -> Iterator[BinaryIO]:
+    """Binary stream over a PDF source
+
+    Paths are opened as files rather than handed to PdfReader, which would read
+    the whole file into memory; the reader then only loads the objects it needs.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield f
+    elif isinstance(source, bytes):
+        yield io.BytesIO(source)
+    else:
+        yield source
+
+
+def _extract_page_range(source: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Worker: extract pages [start, stop) of a PDF path or bytes"""
+    with _open_stream(source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_pdf_pages(
+    source: Union[str, bytes, BinaryIO],
+    max_workers: int = PDF_EXTRACTION_WORKERS,
+    min_parallel_pages: int = PDF_PARALLEL_MIN_PAGES,
+    executor: Optional[Executor] = None,
+) -> ExtractedPdf:
+    """Extract the text of every page of a PDF given as a path, bytes or binary file object
+
+    Documents with at least `min_parallel_pages` pages are split into page ranges
+    that are extracted on a process pool and reassembled in page order. Smaller
+    documents, file objects and max_workers=1 use serial extraction.
+    """
+    if isinstance(source, bytearray):
+        source = bytes(source)
+
+    with _open_stream(source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        page_count = len(reader.pages)
+        if max_workers <= 1 or page_count < max(2, min_parallel_pages) or not isinstance(source, (str, bytes)):
+            page_texts = [page.extract_text() or "" for page in reader.pages]
+            return assemble_pages(page_texts)
+
+    pool = executor or get_extraction_pool()
+    # A few ranges per worker keeps the pool busy when page complexity is uneven
+    ranges = split_page_ranges(page_count, max_workers * 4)
+    futures = [pool.submit(_extract_page_range, source, start, stop) for start, stop in ranges]
+    page_texts = []
+    for future in futures:
+        page_texts.extend(future.result())
+    return assemble_pages(page_texts)
@@ -0,0 +1,158 @@
+# Token counting and per-call prompt budgets for chat completion requests
+import json
+import math
+import os
+import threading
+from functools import lru_cache
+from typing import Callable, List
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # Token counts fall back to a character heuristic
+
+# Context windows of the chat models the pipeline calls
+MODEL_CONTEXT_TOKENS = {"gpt-4": 8192, "gpt-4o": 128000, "gpt-4o-mini": 128000}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Budget settings (override with environment variables)
+PROMPT_BUDGET_TOKENS = int(os.getenv("PROMPT_BUDGET_TOKENS", "0"))  # Cap on prompt tokens per call; 0 uses the context window
+COMPLETION_RESERVE_TOKENS = int(os.getenv("COMPLETION_RESERVE_TOKENS", "1000"))
+
+# Without tiktoken: English prose averages ~4 characters per token, so 3.5 errs towards overcounting
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators of each chat message
+REPLY_PRIMING_TOKENS = 3
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for a model; None without tiktoken or when its encoding can't be loaded (e.g. offline)"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️ Could not load tiktoken encoding for {model}, estimating tokens from characters: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4") -> str:
+    """Cut text to at most max_tokens tokens, marking the cut with an ellipsis"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1]) + "..."
+    return text[:int((max_tokens - 1) * CHARS_PER_TOKEN)] + "..."
+
+
+def count_request_tokens(request: dict) -> int:
+    """Prompt tokens of chat.completions arguments: every message plus any tool schemas"""
+    model = request["model"]
+    tokens = REPLY_PRIMING_TOKENS
+    for message in request["messages"]:
+        tokens += MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "", model)
+    if request.get("tools"):
+        tokens += count_tokens(json.dumps(request["tools"]), model)
+    return tokens
+
+
+def prompt_budget(model: str, completion_tokens: int = COMPLETION_RESERVE_TOKENS) -> int:
+    """Prompt tokens one call may use: the context window minus room for the reply, capped by PROMPT_BUDGET_TOKENS"""
+    budget = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS) - completion_tokens
+    return min(budget, PROMPT_BUDGET_TOKENS) if PROMPT_BUDGET_TOKENS else budget
+
+
+def fit_texts(texts: List[str], max_tokens: int, model: str = "gpt-4") -> List[str]:
+    """Trim texts to fit max_tokens together, cutting only the longest ones down to a common cap"""
+    counts = [count_tokens(text, model) for text in texts]
+    if sum(counts) <= max_tokens:
+        return list(texts)
+    # The cap is the largest length at which texts at or under it stay whole and the rest share what is left
+    remaining = max(0, max_tokens)
+    cap = 0
+    for i, count in enumerate(sorted(counts)):
+        share = remaining // (len(counts) - i)
+        if count > share:
+            cap = share
+            break
+        remaining -= count
+    return [truncate_to_tokens(text, cap, model) if count > cap else text for text, count in zip(texts, counts)]
+
+
+class BudgetStats:
+    """Totals reported by /api/stats: prompts measured, trimmed and tokens saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed = 0
+        self.over_budget = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+
+    def record(self, before: int, after: int, budget: int) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.prompt_tokens += after
+            if after < before:
+                self.trimmed += 1
+                self.tokens_saved += before - after
+            if after > budget:
+                self.over_budget += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokenizer": "tiktoken" if _encoding("gpt-4") is not None else "heuristic",
+                "prompts": self.prompts,
+                "trimmed": self.trimmed,
+                "over_budget": self.over_budget,
+                "prompt_tokens": self.prompt_tokens,
+                "tokens_saved": self.tokens_saved
+            }
+
+
+budget_stats = BudgetStats()
+
+
+def fit_prompt(name: str, build: Callable[[List[str]], dict], texts: List[str],
+               completion_tokens: int = COMPLETION_RESERVE_TOKENS) -> dict:
+    """Build a chat request from variable texts, trimming the longest ones if the prompt exceeds its budget
+
+    `build` must return the request for any list of texts; it is called with
+    empty texts to measure the fixed part of the prompt.
+    """
+    request = build(texts)
+    model = request["model"]
+    budget = prompt_budget(model, request.get("max_tokens", completion_tokens))
+    before = count_request_tokens(request)
+    if before <= budget:
+        budget_stats.record(before, before, budget)
+        return request
+
+    fixed = count_request_tokens(build([""] * len(texts)))
+    # One spare token per text absorbs tokens merging across boundaries
+    request = build(fit_texts(texts, budget - fixed - len(texts), model))
+    after = count_request_tokens(request)
+    budget_stats.record(before, after, budget)
+    if after > budget:
+        print(f"⚠️ {name} prompt is {after} tokens even after trimming ({model} budget {budget})")
+    else:
+        print(f"✂️ Trimmed {name} prompt from {before} to {after} tokens to fit the {budget}-token {model} budget")
+    return request
@@ -0,0 +1,85 @@
+# Adaptive waiting for Assistants API runs
+import asyncio
+import os
+import time
+
+# Polling settings (override with environment variables)
+RUN_POLL_INITIAL_SECONDS = float(os.getenv("RUN_POLL_INITIAL_SECONDS", "0.05"))
+RUN_POLL_MAX_SECONDS = float(os.getenv("RUN_POLL_MAX_SECONDS", "1.0"))
+RUN_POLL_BACKOFF = 1.6
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "90"))
+
+PENDING_RUN_STATUSES = ("queued", "in_progress", "cancelling")
+
+
+class RunDeadlineExceeded(Exception):
+    """Raised when a run is still pending at its deadline (the run is cancelled first)"""
+
+
+def _next_delay(delay: float, deadline: float) -> float:
+    return max(0.0, min(delay, deadline - time.monotonic()))
+
+
+def wait_for_run(client, thread_id: str, run, deadline_seconds: float = RUN_DEADLINE_SECONDS):
+    """Poll a run until it leaves the pending states, starting fast and backing off
+
+    Runs that reach `requires_action` are cancelled, since our assistants have no
+    function tools to satisfy them. Returns the run in its final state.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    delay = RUN_POLL_INITIAL_SECONDS
+    while run.status in PENDING_RUN_STATUSES:
+        if time.monotonic() >= deadline:
+            _cancel_quietly(client, thread_id, run.id)
+            raise RunDeadlineExceeded(f"Run {run.id} still {run.status} after {deadline_seconds}s")
+        time.sleep(_next_delay(delay, deadline))
+        delay = min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX_SECONDS)
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+
+    if run.status == "requires_action":
+        _cancel_quietly(client, thread_id, run.id)
+    return run
+
+
+async def wait_for_run_async(client, thread_id: str, run, deadline_seconds: float = RUN_DEADLINE_SECONDS):
+    """Async variant of wait_for_run"""
+    deadline = time.monotonic() + deadline_seconds
+    delay = RUN_POLL_INITIAL_SECONDS
+    while run.status in PENDING_RUN_STATUSES:
+        if time.monotonic() >= deadline:
+            await _cancel_quietly_async(client, thread_id, run.id)
+            raise RunDeadlineExceeded(f"Run {run.id} still {run.status} after {deadline_seconds}s")
+        await asyncio.sleep(_next_delay(delay, deadline))
+        delay = min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX_SECONDS)
+        run = await client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+
+    if run.status == "requires_action":
+        await _cancel_quietly_async(client, thread_id, run.id)
+    return run
+
+
+def describe_run_failure(run) -> str:
+    """Explain why a run ended without an answer"""
+    if run.status == "failed":
+        last_error = getattr(run, "last_error", None)
+        reason = getattr(last_error, "message", None) or "unknown error"
+        return f"The assistant run failed: {reason}"
+    if run.status == "requires_action":
+        return "The assistant run requested a tool call that is not supported and was cancelled."
+    if run.status == "expired":
+        return "The assistant run expired before completing."
+    return f"I found information related to your question in the document, but couldn't extract specific details. The assistant run status was: {run.status}"
+
+
+def _cancel_quietly(client, thread_id: str, run_id: str) -> None:
+    try:
+        client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    except Exception:
+        pass  # The run may already be terminal
+
+
+async def _cancel_quietly_async(client, thread_id: str, run_id: str) -> None:
+    try:
+        await client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    except Exception:
+        pass  # The run may already be terminal
@@ -0,0 +1,147 @@
+# Per-session presentation state with LRU, TTL and memory-budget eviction
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from data_models import DocumentSummary
+from slide_deck import EMPTY_DECK, SlideDeck
+
+# Store limits (override with environment variables)
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "100"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(6 * 60 * 60)))
+SESSION_MEMORY_BUDGET_MB = int(os.getenv("SESSION_MEMORY_BUDGET_MB", "256"))
+
+# Requests without an X-Session-Id header share this session
+DEFAULT_SESSION_ID = "default"
+SESSION_BASE_BYTES = 1024
+
+
+@dataclass
+class DeckSession:
+    """Everything one client's presentation needs: document, Q&A pairs, slide deck and narration
+
+    Mutating endpoints hold `lock` so concurrent requests of one session don't
+    interleave; other sessions are never blocked by it. Readers take `deck`
+    once and need no lock, since decks are immutable and swapped atomically.
+    """
+    session_id: str
+    document_hash: Optional[str] = None
+    document_summary: Optional[DocumentSummary] = None
+    vector_store_id: Optional[str] = None
+    retrieval_index: Any = None
+    qa_pairs: List[dict] = field(default_factory=list)
+    deck: SlideDeck = EMPTY_DECK
+    upload_job: Any = None
+    narrator: Any = None  # DeckNarrator synthesizing the current deck's audio
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+    def reset_document(self, document_hash: Optional[str] = None) -> None:
+        """Switch to another document, dropping everything derived from the previous one"""
+        self.document_hash = document_hash
+        self.document_summary = None
+        self.vector_store_id = None
+        self.retrieval_index = None
+        self.qa_pairs = []
+        self.clear_slides()
+
+    def publish_deck(self, deck: SlideDeck, keep_narrator: bool = False) -> None:
+        """Swap in a new deck, stopping narration of the previous one
+
+        keep_narrator is for decks published slide by slide while they stream in.
+        """
+        if deck is self.deck:
+            return
+        if self.narrator and not keep_narrator:
+            self.narrator.cancel()
+            self.narrator = None
+        self.deck = deck
+
+    def clear_slides(self) -> None:
+        self.publish_deck(EMPTY_DECK)
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this session (audio itself lives in the disk cache)"""
+        size = SESSION_BASE_BYTES + sum(2 * len(text) for text in self.deck.narrations.values())
+        size += sum(len(str(pair.get("question", ""))) + len(str(pair.get("answer", ""))) for pair in self.qa_pairs)
+        if self.retrieval_index is not None:
+            size += self.retrieval_index.size_bytes()
+        return size
+
+
+class SessionStore:
+    """Sessions by id, evicted when idle past `ttl_seconds`, then least recently used first
+    while over `max_sessions` or `memory_budget_bytes`"""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_COUNT, ttl_seconds: float = SESSION_TTL_SECONDS,
+                 memory_budget_bytes: int = SESSION_MEMORY_BUDGET_MB * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self._sessions: "OrderedDict[str, DeckSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[DeckSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or self._expired(session):
+                return None
+            self._touch(session)
+            return session
+
+    def get_or_create(self, session_id: str = DEFAULT_SESSION_ID) -> DeckSession:
+        """Return the session for an id, creating it on first use, and evict over-limit sessions"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or self._expired(session):
+                session = DeckSession(session_id)
+                self._sessions[session_id] = session
+            self._touch(session)
+            self._evict(keep=session_id)
+            return session
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _touch(self, session: DeckSession) -> None:
+        session.last_access = time.time()
+        self._sessions.move_to_end(session.session_id)
+
+    def _expired(self, session: DeckSession) -> bool:
+        return time.time() - session.last_access > self.ttl_seconds
+
+    def _evict(self, keep: str) -> None:
+        for session_id in [sid for sid, s in self._sessions.items() if sid != keep and self._expired(s)]:
+            self._remove(session_id, "expired")
+        total_bytes = sum(s.size_bytes() for s in self._sessions.values())
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total_bytes > self.memory_budget_bytes):
+            oldest_id = next(iter(self._sessions))
+            if oldest_id == keep:
+                break
+            total_bytes -= self._remove(oldest_id, "over limit")
+
+    def _remove(self, session_id: str, reason: str) -> int:
+        session = self._sessions.pop(session_id)
+        self.evictions += 1
+        print(f"🧹 Evicted session {session_id} ({reason})")
+        return session.size_bytes()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "memory_bytes": sum(s.size_bytes() for s in self._sessions.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,61 @@
+# Immutable, versioned snapshots of a generated slide deck
+import itertools
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from data_models import SlideContent
+
+_deck_versions = itertools.count(1)
+
+
+def narration_text(slide: SlideContent) -> str:
+    """Text read aloud for a slide"""
+    return f"{slide.title}. {slide.content}"
+
+
+@dataclass(frozen=True)
+class SlideDeck:
+    """A deck snapshot: slides in order, indexed by slide number, with narration precomputed
+
+    Decks are never modified. Publishing a new deck is a single attribute
+    assignment, so readers holding a deck always see a consistent snapshot
+    without taking locks. Versions increase monotonically across all decks.
+    """
+    slides: Tuple[SlideContent, ...] = ()
+    version: int = 0
+    by_number: Mapping[int, SlideContent] = field(default_factory=lambda: MappingProxyType({}))
+    narrations: Mapping[int, str] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, slides: Iterable[SlideContent]) -> "SlideDeck":
+        slides = tuple(slides)
+        return cls(
+            slides=slides,
+            version=next(_deck_versions),
+            by_number=MappingProxyType({slide.slide_number: slide for slide in slides}),
+            narrations=MappingProxyType({slide.slide_number: narration_text(slide) for slide in slides})
+        )
+
+    def get(self, slide_number: int) -> Optional[SlideContent]:
+        return self.by_number.get(slide_number)
+
+    def narration(self, slide_number: int) -> Optional[str]:
+        return self.narrations.get(slide_number)
+
+    @property
+    def slide_numbers(self) -> List[int]:
+        return [slide.slide_number for slide in self.slides]
+
+    def __len__(self) -> int:
+        return len(self.slides)
+
+    def __iter__(self) -> Iterator[SlideContent]:
+        return iter(self.slides)
+
+    def __bool__(self) -> bool:
+        return bool(self.slides)
+
+
+# Deck of a session with no generated slides
+EMPTY_DECK = SlideDeck()
@@ -0,0 +1,148 @@
+"""
+Unit tests for the streaming and budgeting helpers
+Covers the incremental slide parser, audio range responses, narration chunking
+and prompt trimming. Needs no API key: run with `python -m pytest test_streaming_helpers.py`.
+"""
+
+import json
+import random
+
+import pytest
+from starlette.requests import Request
+
+from main import audio_file_response, parse_byte_range
+from partial_json import JsonArrayItemStream
+from prompt_budget import count_tokens, fit_texts
+from voice_agent import TTS_INPUT_MAX_CHARS, split_narration_text
+
+SLIDES_DOCUMENT = json.dumps({
+    "title": "Deck with {braces} and [brackets]",
+    "slides": [
+        {"slide_number": 1, "title": "Intro {not an object}", "content": ["a", "b"]},
+        {"slide_number": 2, "title": "Quote \" and backslash \\", "content": [{"nested": [1, 2, {"x": "}"}]}]},
+        {"slide_number": 3, "title": "Unicode ✅ – ok", "content": []}
+    ],
+    "notes": [{"slide_number": 99}]
+})
+
+AUDIO = bytes(range(200))
+CACHE_KEY = "abc123"
+
+
+def fragments(text, seed):
+    rng = random.Random(seed)
+    pieces, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 12)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_partial_json_matches_json_loads_for_any_fragmentation(seed):
+    parser = JsonArrayItemStream("slides")
+    items = []
+    for fragment in fragments(SLIDES_DOCUMENT, seed):
+        items.extend(parser.feed(fragment))
+    assert items == json.loads(SLIDES_DOCUMENT)["slides"]
+    assert parser.done
+
+
+def test_partial_json_yields_items_before_the_array_closes():
+    parser = JsonArrayItemStream("slides")
+    cut = SLIDES_DOCUMENT.index('{"slide_number": 2')
+    assert parser.feed(SLIDES_DOCUMENT[:cut]) == [json.loads(SLIDES_DOCUMENT)["slides"][0]]
+    assert not parser.done
+
+
+def audio_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/slides/1/voice",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=190-", (190, 199)),
+    ("bytes=-10", (190, 199)),
+    ("bytes=150-999", (150, 199)),
+    ("items=0-9", None),
+    ("bytes=0-1,5-6", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, len(AUDIO)) == expected
+
+
+def test_parse_byte_range_rejects_unsatisfiable_ranges():
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=200-", len(AUDIO))
+
+
+def test_audio_range_request_returns_partial_content():
+    response = audio_file_response(audio_request(range="bytes=10-19"), AUDIO, "slide.mp3", CACHE_KEY)
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/200"
+    assert response.body == AUDIO[10:20]
+
+
+def test_audio_unsatisfiable_range_returns_416():
+    response = audio_file_response(audio_request(range="bytes=500-"), AUDIO, "slide.mp3", CACHE_KEY)
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */200"
+
+
+def test_audio_matching_etag_returns_304():
+    response = audio_file_response(audio_request(if_none_match=f'W/"{CACHE_KEY}"'), AUDIO, "slide.mp3", CACHE_KEY)
+    assert response.status_code == 304
+    assert response.headers["etag"] == f'"{CACHE_KEY}"'
+
+
+def test_audio_stale_if_range_returns_full_content():
+    response = audio_file_response(audio_request(range="bytes=0-9", if_range='"old"'), AUDIO, "slide.mp3", CACHE_KEY)
+    assert response.status_code == 200
+    assert response.body == AUDIO
+
+
+@pytest.mark.parametrize("text", [
+    "One sentence. Another one! A third? " * 200,
+    "First paragraph here.\n\nSecond   paragraph\twith  odd spacing. " * 80,
+    "word " * 1000 + "x" * 3500,
+], ids=["sentences", "paragraphs", "unbroken-word"])
+def test_split_narration_text_is_lossless(text):
+    chunks = split_narration_text(text, max_chars=500)
+    assert len(chunks) > 1
+    assert all(500 // 3 <= len(chunk) <= 500 for chunk in chunks)
+    # Only whitespace may change, and an over-long word is cut rather than dropped
+    assert "".join("".join(chunks).split()) == "".join(text.split())
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_split_narration_text_keeps_text_within_one_request_whole(seed):
+    rng = random.Random(seed)
+    sentences = ["Attention is all you need.", "Results improve!", "Why does it work?", "A much longer sentence about the model follows here."]
+    text = "\n\n".join(" ".join(rng.choice(sentences) for _ in range(rng.randint(1, 12))) for _ in range(rng.randint(1, 6)))
+    text = text[:rng.randint(1, TTS_INPUT_MAX_CHARS)]
+    assert split_narration_text(text) == [" ".join(text.split())]
+
+
+def test_split_narration_text_of_blank_text_is_empty():
+    assert split_narration_text(" \n\n\t ") == []
+
+
+def test_fit_texts_trims_only_the_longest_texts():
+    texts = ["short one", "a bit longer text " * 5, "very long text " * 400, "also long text " * 300]
+    counts = [count_tokens(text) for text in texts]
+    max_tokens = counts[0] + counts[1] + 400
+    fitted = fit_texts(texts, max_tokens)
+    assert fitted[:2] == texts[:2]
+    assert all(fitted[i] != texts[i] for i in (2, 3))
+    assert sum(count_tokens(text) for text in fitted) <= max_tokens
+
+
+def test_fit_texts_keeps_texts_that_already_fit():
+    texts = ["alpha", "beta gamma"]
+    assert fit_texts(texts, 1000) == texts
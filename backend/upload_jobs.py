@@ -0,0 +1,159 @@
+# Background upload jobs with per-stage progress
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from data_models import UploadJobStatus
+
+# Stages reported by /api/upload/{job_id}/status, in pipeline order
+UPLOAD_STAGES = ["extracting", "indexing", "summarizing", "done"]
+
+
+@dataclass
+class UploadJob:
+    """Progress of the AI stages for one uploaded document"""
+    job_id: str
+    filename: str
+    document_hash: str
+    status: str = "queued"  # "queued", "running", "completed", "failed"
+    stage: str = UPLOAD_STAGES[0]
+    stages: Dict[str, str] = field(default_factory=lambda: {name: "pending" for name in UPLOAD_STAGES})
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> seconds it ran
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    task: Optional[asyncio.Task] = None
+    _stage_started: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    def start_stage(self, name: str) -> None:
+        self.status = "running"
+        self.stage = name
+        self.stages[name] = "running"
+        self._stage_started[name] = time.perf_counter()
+        self.updated_at = time.time()
+
+    def finish_stage(self, name: str, state: str = "done", seconds: Optional[float] = None) -> None:
+        """Mark a stage finished; its timing is measured from start_stage unless given"""
+        self.stages[name] = state
+        started = self._stage_started.pop(name, None)
+        if seconds is None and started is not None:
+            seconds = time.perf_counter() - started
+        if seconds is not None:
+            self.timings[name] = round(seconds, 3)
+        self.updated_at = time.time()
+
+    def complete(self) -> None:
+        self.status = "completed"
+        self.stage = "done"
+        self.stages["done"] = "done"
+        self.updated_at = time.time()
+
+    def fail(self, error: str) -> None:
+        self.status = "failed"
+        if self.stages.get(self.stage) == "running":
+            self.stages[self.stage] = "failed"
+        self.error = error
+        self.updated_at = time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    async def wait(self) -> None:
+        """Wait for the background task without cancelling it if the waiter goes away"""
+        if self.task is not None and not self.task.done():
+            await asyncio.shield(self.task)
+
+    def to_status(self) -> UploadJobStatus:
+        return UploadJobStatus(
+            jobId=self.job_id,
+            filename=self.filename,
+            status=self.status,
+            stage=self.stage,
+            stages=dict(self.stages),
+            error=self.error,
+            stageTimings=dict(self.timings),
+            elapsedTime=f"{round((self.updated_at if self.finished else time.time()) - self.created_at, 2)} seconds"
+        )
+
+
+@dataclass
+class Stage:
+    """One node of an upload's stage graph
+
+    `run` receives the results of the finished stages by name and starts as
+    soon as every stage in `depends_on` has finished.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+
+
+async def run_stages(job: UploadJob, stages: List[Stage]) -> Dict[str, Any]:
+    """Run a stage graph on the job, each stage concurrently with every stage it doesn't depend on
+
+    Stages must be listed after their dependencies. Returns each stage's result
+    by name. If a stage fails, the others are cancelled and marked "skipped",
+    and the error is raised.
+    """
+    results: Dict[str, Any] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage) -> None:
+        try:
+            await asyncio.gather(*(tasks[name] for name in stage.depends_on))
+        except Exception:
+            job.finish_stage(stage.name, "skipped")
+            raise
+        job.start_stage(stage.name)
+        try:
+            results[stage.name] = await stage.run(results)
+        except Exception:
+            job.stage = stage.name
+            job.finish_stage(stage.name, "failed")
+            raise
+        if job.stages[stage.name] == "running":
+            job.finish_stage(stage.name)
+
+    for stage in stages:
+        if any(name not in tasks for name in stage.depends_on):
+            raise ValueError(f"Stage {stage.name} is listed before its dependencies {stage.depends_on}")
+        tasks[stage.name] = asyncio.create_task(run(stage))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for name in tasks:
+            if job.stages.get(name) in ("pending", "running"):
+                job.finish_stage(name, "skipped")
+        raise
+    return results
+
+
+class UploadJobRegistry:
+    """In-memory registry of recent upload jobs, pruning the oldest finished ones"""
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, UploadJob]" = OrderedDict()
+
+    def create(self, filename: str, document_hash: str) -> UploadJob:
+        job = UploadJob(job_id=uuid.uuid4().hex, filename=filename, document_hash=document_hash)
+        self._jobs[job.job_id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
@@ -1,26 +1,110 @@
 from dotenv import load_dotenv
 import asyncio
-from openai import OpenAI
-from typing import List, Optional
+from openai import OpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from typing import AsyncIterator, List, Optional, Sequence
 import json
 import os
+import re
+import zlib
 from data_models import SlideContent, DocumentSummary
+from slide_deck import narration_text
+from audio_cache import audio_cache, audio_cache_key, TTS_MODEL, TTS_FORMAT
 
 load_dotenv()
 
+# TTS retry settings (override with environment variables)
+TTS_MAX_ATTEMPTS = int(os.getenv("TTS_MAX_ATTEMPTS", "3"))
+TTS_RETRY_BASE_SECONDS = float(os.getenv("TTS_RETRY_BASE_SECONDS", "0.5"))
+TRANSIENT_TTS_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+TTS_STREAM_CHUNK_BYTES = 4096
+
+# Long-text narration settings (the TTS endpoint accepts at most 4096 characters per request)
+TTS_INPUT_MAX_CHARS = 4000
+TTS_CHUNK_CHARS = min(int(os.getenv("TTS_CHUNK_CHARS", "1500")), TTS_INPUT_MAX_CHARS)
+TTS_CHUNK_CONCURRENCY = int(os.getenv("TTS_CHUNK_CONCURRENCY", "4"))
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+")
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    return pieces + [sentence] if sentence else pieces
+
+
+def split_narration_text(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of whole sentences, each at most max_chars characters
+
+    Text that fits one TTS request is returned whole, with its whitespace
+    normalized. Longer text is cut at paragraph ends and after sentences whose
+    checksum is divisible by 4, so boundaries depend on content rather than
+    position: editing one sentence changes only the chunks around it, and the
+    others keep their audio cache keys. Content-defined cuts leave at least a
+    third of max_chars on both sides, so no chunk is a short fragment.
+    """
+    normalized = " ".join(text.split())
+    if len(normalized) <= TTS_INPUT_MAX_CHARS:
+        return [normalized] if normalized else []
+
+    min_chars = max_chars // 3
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        pieces = [
+            piece
+            for sentence in SENTENCE_BOUNDARY.split(paragraph.strip())
+            for piece in _split_long_sentence(" ".join(sentence.split()), max_chars)
+        ]
+        remaining = sum(len(piece) + 1 for piece in pieces)  # Characters of the paragraph after the current piece
+        for piece in pieces:
+            remaining -= len(piece) + 1
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {piece}" if current else piece
+            if len(current) >= min_chars and remaining >= min_chars and zlib.crc32(piece.encode("utf-8")) % 4 == 0:
+                chunks.append(current)
+                current = ""
+        # Short paragraphs run on into the next one
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        if chunks and len(chunks[-1]) + 1 + len(current) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks
+
 class SimpleVoiceAgent:
     """Simplified voice agent for slide narration using real backend data"""
     
-    def __init__(self, openai_client: OpenAI = None):
+    def __init__(self, openai_client: OpenAI = None, session=None, async_client=None):
         self.openai_client = openai_client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.async_client = async_client  # AsyncOpenAI, enables streaming synthesis
+        self.session = session  # DeckSession to narrate; the backend's default session if None
         self.current_slide = 0
+    
+    def get_session(self):
+        """Get the backend session this agent narrates"""
+        if self.session is None:
+            from main import session_store
+            from session_store import DEFAULT_SESSION_ID
+            self.session = session_store.get_or_create(DEFAULT_SESSION_ID)
+        return self.session
         
-    def get_real_slides(self) -> List[SlideContent]:
+    def get_deck(self):
+        """Get the session's current SlideDeck snapshot"""
+        return self.get_session().deck
+        
+    def get_real_slides(self) -> Sequence[SlideContent]:
         """Get real slides from the main backend"""
         try:
-            # Import the global slides from main.py
-            from main import sample_slides
-            return sample_slides
+            return self.get_deck().slides
         except ImportError:
             print("Warning: Could not import slides from main.py, using empty list")
             return []
@@ -28,9 +112,7 @@ class SimpleVoiceAgent:
     def get_real_document_summary(self) -> Optional[DocumentSummary]:
         """Get real document summary from the main backend"""
         try:
-            # Import the global document summary from main.py
-            from main import current_document_summary
-            return current_document_summary
+            return self.get_session().document_summary
         except ImportError:
             print("Warning: Could not import document summary from main.py")
             return None
@@ -41,16 +123,15 @@ class SimpleVoiceAgent:
         if not slides or self.current_slide >= len(slides):
             return "No slides available for narration."
             
-        slide = slides[self.current_slide]
-        return f"{slide.title}. {slide.content}"
+        return narration_text(slides[self.current_slide])
     
     def get_slide_narration(self, slide_number: int) -> str:
         """Get narration text for specific slide"""
-        slides = self.get_real_slides()
-        slide = next((s for s in slides if s.slide_number == slide_number), None)
-        if not slide:
-            return "Slide not found."
-        return f"{slide.title}. {slide.content}"
+        try:
+            narration = self.get_deck().narration(slide_number)
+        except ImportError:
+            narration = None
+        return narration if narration is not None else "Slide not found."
     
     def get_all_slides_count(self) -> int:
         """Get total number of real slides"""
@@ -70,15 +151,88 @@ class SimpleVoiceAgent:
             "slides": [{"number": s.slide_number, "title": s.title} for s in slides]
         }
     
+    async def synthesize_audio(self, text: str, voice: str = "alloy", max_attempts: int = TTS_MAX_ATTEMPTS) -> bytes:
+        """Generate audio off the event loop, reusing cached audio and retrying transient API errors
+
+        Raises the last error once every attempt has failed.
+        """
+        key = audio_cache_key(text, voice)
+        cached_audio = await asyncio.to_thread(audio_cache.get, key)
+        if cached_audio:
+            return cached_audio
+        for attempt in range(1, max_attempts + 1):
+            try:
+                # The sync client blocks, so the request runs in a worker thread
+                response = await asyncio.to_thread(
+                    self.openai_client.audio.speech.create,
+                    model=TTS_MODEL,
+                    voice=voice,
+                    input=text,
+                    response_format=TTS_FORMAT
+                )
+                break
+            except TRANSIENT_TTS_ERRORS as e:
+                if attempt == max_attempts:
+                    raise
+                delay = TTS_RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+                print(f"⚠️ TTS attempt {attempt} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        await asyncio.to_thread(audio_cache.put, key, response.content)
+        return response.content
+    
+    async def stream_audio(self, text: str, voice: str = "alloy", chunk_size: int = TTS_STREAM_CHUNK_BYTES) -> AsyncIterator[bytes]:
+        """Yield audio chunks as the TTS response arrives, caching the full audio once it completes
+
+        Cached narrations are replayed from the cache. Without an async client
+        the audio is synthesized in full and yielded as one chunk.
+        """
+        key = audio_cache_key(text, voice)
+        cached_audio = await asyncio.to_thread(audio_cache.get, key)
+        if cached_audio:
+            yield cached_audio
+            return
+        if self.async_client is None:
+            yield await self.synthesize_audio(text, voice)
+            return
+        chunks = []
+        async with self.async_client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=text,
+            response_format=TTS_FORMAT
+        ) as response:
+            async for chunk in response.iter_bytes(chunk_size):
+                chunks.append(chunk)
+                yield chunk
+        # Only complete responses reach the cache; a disconnected client stops the generator above
+        await asyncio.to_thread(audio_cache.put, key, b"".join(chunks))
+    
+    async def stream_long_audio(self, chunks: List[str], voice: str = "alloy", concurrency: int = TTS_CHUNK_CONCURRENCY) -> AsyncIterator[bytes]:
+        """Yield the audio of text chunks in order, synthesizing them concurrently
+
+        The first chunk is streamed for a fast start while the others are
+        synthesized (at most `concurrency` at once) and cached individually.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency - 1))
+        
+        async def synthesize(chunk: str) -> bytes:
+            async with semaphore:
+                return await self.synthesize_audio(chunk, voice)
+        
+        remaining = [asyncio.create_task(synthesize(chunk)) for chunk in chunks[1:]]
+        try:
+            async for piece in self.stream_audio(chunks[0], voice):
+                yield piece
+            for task in remaining:
+                yield await task
+        finally:
+            for task in remaining:
+                task.cancel()
+    
     async def generate_audio(self, text: str, voice: str = "alloy") -> bytes:
-        """Generate audio from text using OpenAI TTS"""
+        """Generate audio from text using OpenAI TTS, reusing cached audio for identical narrations"""
         try:
-            response = self.openai_client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text
-            )
-            return response.content
+            return await self.synthesize_audio(text, voice)
         except Exception as e:
             print(f"Error generating audio: {e}")
             return b""
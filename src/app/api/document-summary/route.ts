@@ -1,10 +1,12 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
     // Proxy to FastAPI backend instead of returning hardcoded data
     const backendUrl = process.env.FASTAPI_URL || 'http://localhost:8000';
-    const response = await fetch(`${backendUrl}/api/document-summary`);
+    const response = await fetch(`${backendUrl}/api/document-summary`, {
+      headers: { 'X-Session-Id': request.headers.get('x-session-id') ?? 'default' },
+    });
     
     if (!response.ok) {
       console.warn('FastAPI backend not available for document summary');
@@ -33,7 +33,9 @@ export async function GET(
 ) {
   try {
     const backendUrl = process.env.FASTAPI_URL || 'http://localhost:8000';
-    const response = await fetch(`${backendUrl}/api/slides/${params.slideNumber}`);
+    const response = await fetch(`${backendUrl}/api/slides/${params.slideNumber}`, {
+      headers: { 'X-Session-Id': request.headers.get('x-session-id') ?? 'default' },
+    });
     
     if (!response.ok) {
       return NextResponse.json(
@@ -67,6 +69,7 @@ export async function POST(
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'X-Session-Id': request.headers.get('x-session-id') ?? 'default',
         },
       });
       
@@ -1,10 +1,12 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
     // Proxy to FastAPI backend instead of returning hardcoded data
     const backendUrl = process.env.FASTAPI_URL || 'http://localhost:8000';
-    const response = await fetch(`${backendUrl}/api/slides`);
+    const response = await fetch(`${backendUrl}/api/slides`, {
+      headers: { 'X-Session-Id': request.headers.get('x-session-id') ?? 'default' },
+    });
     
     if (!response.ok) {
       // If backend is not available, return empty array instead of Claude Agents data
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect, useRef } from "react";
 import { SlideContent, LiveUpdate } from "@/types/api";
-import { ApiClient } from "@/lib/api";
+import { ApiClient, sessionHeaders } from "@/lib/api";
 import DocumentSummaryComponent, { DocumentSummaryRef } from "@/components/DocumentSummary";
 import DocumentUpload from "@/components/DocumentUpload";
 
@@ -27,6 +27,14 @@ export default function Home() {
     loadInitialData();
   }, []);
 
+  // Live updates are pushed by the backend instead of polled
+  useEffect(() => {
+    const unsubscribe = ApiClient.subscribeToLiveUpdates((update) => {
+      setLiveUpdates((previous) => [...previous, update].slice(-50));
+    });
+    return unsubscribe;
+  }, []);
+
   const loadInitialData = async () => {
     try {
       setLoading(true);
@@ -40,10 +48,6 @@ export default function Home() {
         setCurrentSlideNumber(1);
       }
       
-      // Load live updates
-      const updates = await ApiClient.getLiveUpdates();
-      setLiveUpdates(updates);
-      
     } catch (err) {
       console.error('Failed to load initial data:', err);
       setError('Failed to load presentation data');
@@ -57,18 +61,21 @@ export default function Home() {
     try {
       console.log('🎯 Generating slides from Q&A pairs...');
       
-      // Call the FastAPI backend to generate slides
-      const generatedSlides = await ApiClient.generateSlides();
+      // Stream slides from the FastAPI backend, showing each one as it arrives
+      setSlides([]);
+      const generatedSlides = await ApiClient.streamSlides((slide) => {
+        setSlides(prev => [...prev, slide]);
+        setTotalSlides(slide.slide_number);
+        if (slide.slide_number === 1) {
+          setCurrentSlideNumber(1);
+        }
+      });
       console.log('✅ Generated slides:', generatedSlides);
-      
+
       // Update slides and navigation
       setSlides(generatedSlides);
       setTotalSlides(generatedSlides.length);
       
-      if (generatedSlides.length > 0) {
-        setCurrentSlideNumber(1);
-      }
-      
       console.log('🎉 Slides updated successfully!');
     } catch (err) {
       console.error('❌ Failed to generate slides:', err);
@@ -102,7 +109,7 @@ export default function Home() {
       // Call the backend to get the MP3 audio file
       const response = await fetch(`/api/slides/${slideNumber}`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...sessionHeaders() },
         body: JSON.stringify({ action: 'generate_voice' })
       });
       
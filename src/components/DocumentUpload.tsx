@@ -169,7 +169,7 @@ export default function DocumentUpload({ onUploadComplete }: DocumentUploadProps
                 <svg className="w-4 h-4" fill="currentColor" viewBox="0 0 20 20">
                   <path fillRule="evenodd" d="M4 4a2 2 0 012-2h8a2 2 0 012 2v12a2 2 0 01-2 2H6a2 2 0 01-2-2V4zm2 0v12h8V4H6z" clipRule="evenodd" />
                 </svg>
-                <span>PDF files only • Max 10MB</span>
+                <span>PDF files only • Max 250MB</span>
               </div>
             </div>
           </div>
@@ -1,15 +1,33 @@
 import { SlideContent, LiveUpdate, DocumentSummary, UploadResult } from '@/types/api';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+const SESSION_STORAGE_KEY = 'presentationSessionId';
+
+// The backend keeps one document, deck and narration per X-Session-Id, so every
+// browser tab gets its own id and presenters don't overwrite each other.
+export function getSessionId(): string {
+  let sessionId = window.sessionStorage.getItem(SESSION_STORAGE_KEY);
+  if (!sessionId) {
+    // randomUUID needs a secure context; plain-http deployments fall back to Math.random
+    sessionId = window.crypto.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    window.sessionStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+  return sessionId;
+}
+
+export function sessionHeaders(): Record<string, string> {
+  return { 'X-Session-Id': getSessionId() };
+}
 
 export class ApiClient {
   private static async request<T>(endpoint: string, options?: RequestInit): Promise<T> {
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...sessionHeaders(),
         ...options?.headers,
       },
-      ...options,
     });
 
     if (!response.ok) {
@@ -24,7 +42,9 @@ export class ApiClient {
   }
 
   static async getSlide(slideNumber: number): Promise<SlideContent> {
-    const response = await fetch(`${API_BASE_URL}/api/slides/${slideNumber}`);
+    const response = await fetch(`${API_BASE_URL}/api/slides/${slideNumber}`, {
+      headers: sessionHeaders(),
+    });
     if (!response.ok) {
       throw new Error(`Failed to fetch slide ${slideNumber}`);
     }
@@ -32,7 +52,9 @@ export class ApiClient {
   }
 
   static async getSlidesMetadata(): Promise<{ total_slides: number; available_slides: number[] }> {
-    const response = await fetch(`${API_BASE_URL}/api/slides/metadata`);
+    const response = await fetch(`${API_BASE_URL}/api/slides/metadata`, {
+      headers: sessionHeaders(),
+    });
     if (!response.ok) {
       throw new Error('Failed to fetch slides metadata');
     }
@@ -40,15 +62,29 @@ export class ApiClient {
   }
 
   static async getLiveUpdates(): Promise<LiveUpdate[]> {
-    const response = await fetch(`${API_BASE_URL}/api/live-updates`);
+    const response = await fetch(`${API_BASE_URL}/api/live-updates`, {
+      headers: sessionHeaders(),
+    });
     if (!response.ok) {
       throw new Error('Failed to fetch live updates');
     }
     return response.json();
   }
 
+  // Push channel for live updates: replays recent updates, then streams new ones.
+  // EventSource reconnects on its own and resumes from the last event id.
+  static subscribeToLiveUpdates(onUpdate: (update: LiveUpdate) => void): () => void {
+    const source = new EventSource(`${API_BASE_URL}/api/live-updates/stream`);
+    source.addEventListener('live-update', (event) => {
+      onUpdate(JSON.parse((event as MessageEvent).data));
+    });
+    return () => source.close();
+  }
+
   static async getDocumentSummary(): Promise<DocumentSummary> {
-    const response = await fetch(`${API_BASE_URL}/api/document-summary`);
+    const response = await fetch(`${API_BASE_URL}/api/document-summary`, {
+      headers: sessionHeaders(),
+    });
     if (!response.ok) {
       throw new Error('Failed to fetch document summary');
     }
@@ -61,6 +97,7 @@ export class ApiClient {
 
     const response = await fetch(`${API_BASE_URL}/api/upload`, {
       method: 'POST',
+      headers: sessionHeaders(),
       body: formData,
     });
 
@@ -69,7 +106,12 @@ export class ApiClient {
       throw new Error(errorData.detail || 'Failed to upload PDF');
     }
 
-    return response.json();
+    const result: UploadResult = await response.json();
+    // Keep using the session the document was loaded into
+    if (result.sessionId) {
+      window.sessionStorage.setItem(SESSION_STORAGE_KEY, result.sessionId);
+    }
+    return result;
   }
 
   static async generateSlides(): Promise<SlideContent[]> {
@@ -77,6 +119,7 @@ export class ApiClient {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        ...sessionHeaders(),
       },
     });
 
@@ -88,6 +131,42 @@ export class ApiClient {
     return response.json();
   }
 
+  // Same as generateSlides, but reads the NDJSON stream so each slide can be shown
+  // as soon as it is generated. Resolves with the full deck.
+  static async streamSlides(onSlide: (slide: SlideContent) => void): Promise<SlideContent[]> {
+    const response = await fetch(`${API_BASE_URL}/api/generate-slides/stream`, {
+      method: 'POST',
+      headers: sessionHeaders(),
+    });
+
+    if (!response.ok || !response.body) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || 'Failed to generate slides');
+    }
+
+    const slides: SlideContent[] = [];
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() ?? '';
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.event === 'slide') {
+          slides.push(event.slide);
+          onSlide(event.slide);
+        } else if (event.event === 'error') {
+          throw new Error(event.detail);
+        }
+      }
+      if (done) return slides;
+    }
+  }
+
   static async regenerateSlides(): Promise<SlideContent[]> {
     return this.request<SlideContent[]>('/api/regenerate-slides', {
       method: 'POST',
@@ -42,4 +42,7 @@ export interface UploadResult {
   detectedLanguage: string;
   complexity: string;
   extractedText: string; // Full text content from Python backend
+  jobId?: string; // Background job running the AI stages
+  jobStatus?: string;
+  sessionId?: string;
 } 
\ No newline at end of file